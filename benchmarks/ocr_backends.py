@@ -0,0 +1,66 @@
+"""Compare the OCR backends behind ``ocr_numeric_image``.
+
+    python -m benchmarks.ocr_backends [--images DIR] [--repeat N]
+
+With ``--images`` every file in DIR is used (e.g. imgValor*.asp responses saved from
+carrosnaweb); otherwise a set of numeric images similar to the site's is rendered
+with Pillow. Prints images/sec per backend and how often the backends agree.
+"""
+import io
+import time
+import argparse
+from pathlib import Path
+from PIL import Image, ImageDraw
+from src.Common import utils
+
+_SAMPLE_VALUES = ['999', '1.598', '1.332', '2.488', '4.090', '1.165', '82', '10,2', '116', '4.553']
+
+
+def _render(value: str) -> bytes:
+    image = Image.new('L', (12 * len(value) + 8, 22), color=255)
+    ImageDraw.Draw(image).text((4, 4), value, fill=0)
+    buf = io.BytesIO()
+    image.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _load_images(directory: str | None) -> list[bytes]:
+    if directory:
+        return [path.read_bytes() for path in sorted(Path(directory).iterdir()) if path.is_file()]
+    return [_render(value) for value in _SAMPLE_VALUES]
+
+
+def _run(backend: str, images: list[bytes], repeat: int) -> tuple[float, list[str | None]]:
+    utils.set_ocr_backend(backend)
+    results = [utils.ocr_numeric_image(image) for image in images]  # warm-up (engine init)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            utils.ocr_numeric_image(image)
+    elapsed = time.perf_counter() - start
+    return len(images) * repeat / elapsed, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='OCR backend benchmark')
+    parser.add_argument('--images', help='Directory with image files to recognise')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    images = _load_images(args.images)
+    backends = ['pytesseract'] + (['tesserocr'] if utils.tesserocr is not None else [])
+    if len(backends) == 1:
+        print('tesserocr is not installed, only the pytesseract baseline will be measured')
+
+    outputs = {}
+    for backend in backends:
+        rate, outputs[backend] = _run(backend, images, args.repeat)
+        print(f'{backend:<12} {rate:8.1f} images/s  ({len(images)} images x {args.repeat})')
+
+    if len(outputs) == 2:
+        same = sum(a == b for a, b in zip(outputs['pytesseract'], outputs['tesserocr']))
+        print(f'agreement    {same}/{len(images)} images')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,16 @@
 import asyncio
-import random
+from typing import AsyncIterator
+from yarl import URL
 from src.Logger import get_logger
+from src.Model.Document import HtmlDocument
 from src.Common.utils import ocr_numeric_image
+from src.Common.OcrCache import OcrCache
+from src.Common.OcrExecutor import OcrExecutor
 from src.Common.DatabaseRepository import DatabaseRepository
+from src.Common.JobLease import new_worker_id
+from src.Common.Backlog import Backlog
+from src.Common.SpecNormalizer import normalize_sheet
+from src.Common.WorkerPool import SheetWorkerPool
 from src.CarrosWeb.CarrosWebParser import CarrosWebParser
 from src.CarrosWeb.CarrosWebRequestFactory import CarrosWebRequestFactory
 
@@ -10,69 +18,102 @@ logger = get_logger('CarrosWebCrawler', reference='carrosweb')
 
 
 class CarrosWebCrawler:
+    SOURCE = 'carrosweb'
+    # Widest anoini..anofim span requested from the version listing at once
+    VERSION_RANGE_YEARS = 10
+
     def __init__(self, factory: CarrosWebRequestFactory, parser: CarrosWebParser,
-                 db: DatabaseRepository = None):
+                 db: DatabaseRepository = None, lease_seconds: int = 300, ocr: OcrExecutor | None = None,
+                 ocr_cache: OcrCache | None = None):
         self._factory = factory
         self._parser = parser
         self._db = db
-
-    async def catalog_phase(self) -> int:
+        self._lease_seconds = lease_seconds
+        self._worker_id = new_worker_id(self.SOURCE)
+        self._range_listing = True
+        self._ocr = ocr
+        self._ocr_cache = ocr_cache
+        self._session_lock = asyncio.Lock()
+
+    async def catalog_phase(self, backlog: Backlog | None = None, concurrency: int = 4) -> int:
+        """Discover every version and queue a job for each one not seen before.
+
+        Automakers and models are walked as concurrent tasks, with at most ``concurrency``
+        of them fetching pages at a time; the host pacer still spaces the requests themselves.
+        Each model's versions go to the queue in one bulk write.
+        """
+        limit = asyncio.Semaphore(max(concurrency, 1))
         automakers = await self._get_automakers()
-        total_jobs = 0
-
-        for automaker in automakers:
-            models = await self._get_models(automaker)
-            for model in models:
-                years = await self._get_years(automaker, model)
-                for year in years:
-                    versions = await self._get_versions_code(automaker, model, [year, year])
-                    for version_name, href in versions.items():
-                        code = href.split('=')[-1] if '=' in href else href
-                        doc = await self._db.insert_vehicle(automaker, model, year, version_name, code)
-                        if doc:
-                            total_jobs += 1
+        counts = await asyncio.gather(*(self._catalog_automaker(automaker, limit, backlog)
+                                        for automaker in automakers))
+        total_jobs = sum(counts)
 
         logger.info(f'catalog_phase - {total_jobs} new jobs created')
         return total_jobs
 
-    async def sheet_worker(self) -> int:
-        total = 0
-
-        while True:
-            jobs = await self._db.pop_pending_jobs(limit=2)
-            if not jobs:
-                logger.info('sheet_worker - no pending jobs, done')
-                break
-
-            for job in jobs:
-                code = job['reference']
-                sheet = await self._technical_sheet(code)
-                if sheet:
-                    sheet.update({
-                        'montadora': job['automaker'],
-                        'modelo': job['model'],
-                        'versao': job['version'],
-                        'ano': job['year'],
-                        'source': 'carrosweb',
-                    })
-                    await self._db.save_sheet(sheet)
-                    await self._db.update_vehicle(str(job['_id']), {'status': 'done'})
-                    total += 1
-                else:
-                    await self._db.update_vehicle(str(job['_id']), {'status': 'error'})
-                    logger.warning(f'sheet_worker - failed job {job["_id"]} [{code}], marked as error')
-
-            delay = random.uniform(10, 50)
-            logger.info(f'sheet_worker - processed {len(jobs)} jobs, sleeping {delay:.0f}s')
-            await asyncio.sleep(delay)
-
-        logger.info(f'sheet_worker - finished, {total} sheets saved')
-        return total
-
-    async def crawler(self) -> list[dict]:
+    async def _catalog_automaker(self, automaker: str, limit: asyncio.Semaphore, backlog: Backlog | None) -> int:
+        try:
+            async with limit:
+                models = await self._get_models(automaker)
+        except Exception as e:
+            logger.error(f'{automaker} | catalog failed: {e}')
+            return 0
+
+        counts = await asyncio.gather(*(self._catalog_model(automaker, model, limit, backlog) for model in models))
+        return sum(counts)
+
+    async def _catalog_model(self, automaker: str, model: str, limit: asyncio.Semaphore,
+                             backlog: Backlog | None) -> int:
+        try:
+            async with limit:
+                years = await self._get_years(automaker, model)
+                vehicles = []
+                for year, version_name, href in await self._get_versions_by_year(automaker, model, years):
+                    code = href.split('=')[-1] if '=' in href else href
+                    vehicles.append({'automaker': automaker, 'model': model, 'year': year,
+                                     'version': version_name, 'reference': code})
+
+            if backlog:
+                await backlog.wait()
+            created = await self._db.insert_vehicles(self.SOURCE, vehicles)
+        except Exception as e:
+            # One model failing must not abort the rest of the walk
+            logger.error(f'{automaker} : {model} | catalog failed: {e}')
+            return 0
+
+        logger.info(f'{automaker} : {model} | {created} new jobs out of {len(vehicles)} versions')
+        return created
+
+    def sheet_pool(self, workers: int = 1, follow: bool = False) -> SheetWorkerPool:
+        return SheetWorkerPool(self._db, self.SOURCE, self._worker_id, self._process_job,
+                               workers=workers, lease_seconds=self._lease_seconds, follow=follow)
+
+    async def sheet_worker(self, workers: int = 1, follow: bool = False) -> int:
+        return await self.sheet_pool(workers, follow).run()
+
+    async def _process_job(self, job: dict) -> bool:
+        code = job['reference']
+        sheet = await self._technical_sheet(code)
+        if not sheet:
+            return False
+
+        sheet.update({
+            'montadora': job['automaker'],
+            'modelo': job['model'],
+            'versao': job['version'],
+            'ano': job['year'],
+            'source': self.SOURCE,
+            'reference': code,
+        })
+        outcome = await self._db.save_sheet(sheet)
+        logger.debug(f'technical_sheet [{code}] - {outcome}')
+        return True
+
+    async def crawler(self) -> AsyncIterator[dict]:
+        """Yield each technical sheet as soon as it is fetched; nothing is accumulated here."""
         automakers = await self._get_automakers()
-        all_sheets: list[dict] = []
         seen_codes: set[str] = set()
+        collected = 0
 
         for automaker in automakers:
             models = await self._get_models(automaker)
@@ -80,26 +121,49 @@ class CarrosWebCrawler:
             for model in models:
                 years = await self._get_years(automaker, model)
 
-                for year in years:
-                    versions = await self._get_versions_code(automaker, model, [year, year])
+                for year, version_name, href in await self._get_versions_by_year(automaker, model, years):
+                    code = href.split('=')[-1] if '=' in href else href
+                    if code in seen_codes:
+                        continue
+                    seen_codes.add(code)
+
+                    sheet = await self._technical_sheet(code)
+                    if sheet:
+                        sheet['montadora'] = automaker
+                        sheet['modelo'] = model
+                        sheet['ano'] = year
+                        sheet['versao'] = version_name
+                        sheet['source'] = self.SOURCE
+                        sheet['reference'] = code
+                        collected += 1
+                        yield sheet
+
+        logger.info(f'crawler - finished, collected {collected} technical sheets')
 
-                    for version_name, href in versions.items():
-                        code = href.split('=')[-1] if '=' in href else href
-                        if code in seen_codes:
-                            continue
-                        seen_codes.add(code)
-
-                        sheet = await self._technical_sheet(code)
-                        if sheet:
-                            sheet['montadora'] = automaker
-                            sheet['modelo'] = model
-                            sheet['ano'] = year
-                            sheet['versao'] = version_name
-                            sheet['source'] = 'carrosweb'
-                            all_sheets.append(sheet)
+    # ------------------------------------------------------------------ #
+    # Re-parsing archived pages                                            #
+    # ------------------------------------------------------------------ #
 
-        logger.info(f'crawler - finished, collected {len(all_sheets)} technical sheets')
-        return all_sheets
+    @staticmethod
+    def sheet_reference(url: str) -> str | None:
+        return URL(url).query.get('codigo')
+
+    @staticmethod
+    def parse_archived_sheet(content: str) -> dict | None:
+        """Parse an archived sheet page again. Runs in the reparse worker processes, so it
+        only needs a parser; __ocr__ placeholders are left for :meth:`keep_previous_values`."""
+        parser = CarrosWebParser()
+        document = HtmlDocument(content)
+        if parser.is_error_page(document):
+            return None
+        return parser.technical_sheet(document)
+
+    @staticmethod
+    def keep_previous_values(sheet: dict, previous: dict) -> dict:
+        # The anti-scraping images are tied to the session that fetched the page and are not
+        # archived, so every __ocr__ placeholder takes the value already stored for its key
+        return {key: previous.get(key) if isinstance(value, dict) and '__ocr__' in value else value
+                for key, value in sheet.items()}
 
     # ------------------------------------------------------------------ #
     # Internal helpers                                                      #
@@ -112,11 +176,13 @@ class CarrosWebCrawler:
             logger.warning(f'get_automakers - unexpected status: {response.status}')
             return []
 
-        if self._parser.is_error_page(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_error_page(document):
+            self._factory.report_blocked('error page')
             logger.warning('get_automakers - error page detected')
             return []
 
-        automakers = self._parser.automakers(response.content)
+        automakers = self._parser.automakers(document)
         logger.info(f'get_automakers - found {len(automakers)} automakers')
         return automakers
 
@@ -127,11 +193,13 @@ class CarrosWebCrawler:
             logger.warning(f'get_models - unexpected status: {response.status}')
             return []
 
-        if self._parser.is_error_page(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_error_page(document):
+            self._factory.report_blocked('error page')
             logger.warning('get_models - error page detected')
             return []
 
-        models = self._parser.models(response.content)
+        models = self._parser.models(document)
         logger.info(f'{automaker} | get_models - found {len(models)} models')
         return models
 
@@ -142,61 +210,126 @@ class CarrosWebCrawler:
             logger.warning(f'get_years - unexpected status: {response.status}')
             return []
 
-        if self._parser.is_error_page(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_error_page(document):
+            self._factory.report_blocked('error page')
             logger.warning('get_years - error page detected')
             return []
 
-        years = self._parser.years(response.content)
+        years = self._parser.years(document)
         logger.info(f'{automaker} : {model} | get_years - found {len(years)} years')
         return years
 
-    async def _get_versions_code(self, automaker: str, model: str, year: list) -> dict:
-        start_year = year[0]
-        final_year = year[1]
-
+    async def _get_versions_by_year(self, automaker: str, model: str, years: list[str]) -> list[tuple[str, str, str]]:
+        """(year, version name, href) for every version of ``years``.
+
+        Numeric years are requested as anoini..anofim ranges spanning at most
+        ``VERSION_RANGE_YEARS`` years, so a model needs one or two listing requests instead of
+        one per year. The year of each version comes from the listing itself: a paginated
+        range is split in half, and a range that fails or has versions it cannot place
+        falls back to one request per year. Once a listing shows no years at all, ranges are
+        not tried again.
+        """
+        numeric = sorted({int(year) for year in years if year.isdigit()})
+        found = await self._get_versions_per_year(automaker, model, [year for year in years if not year.isdigit()])
+
+        while numeric:
+            chunk = [year for year in numeric if year < numeric[0] + self.VERSION_RANGE_YEARS]
+            numeric = numeric[len(chunk):]
+            found.extend(await self._get_version_range(automaker, model, chunk))
+        return found
+
+    async def _get_version_range(self, automaker: str, model: str, years: list[int]) -> list[tuple[str, str, str]]:
+        if len(years) == 1 or not self._range_listing:
+            return await self._get_versions_per_year(automaker, model, [str(year) for year in years])
+
+        low, high = years[0], years[-1]
+        listing = await self._get_versions_listing(automaker, model, str(low), str(high))
+        if listing is None:
+            # A failed range would lose every year in it; one request per year loses at most one
+            logger.warning(f'{automaker} : {model} : {low}-{high} | range listing failed, one request per year')
+            return await self._get_versions_per_year(automaker, model, [str(year) for year in years])
+
+        versions, paginated = listing
+        if paginated:
+            middle = len(years) // 2
+            logger.info(f'{automaker} : {model} : {low}-{high} | listing paginated, splitting')
+            return (await self._get_version_range(automaker, model, years[:middle])
+                    + await self._get_version_range(automaker, model, years[middle:]))
+
+        if all(year and low <= int(year) <= high for _, _, year in versions):
+            return [(year, name, href) for name, href, year in versions]
+
+        if versions and not any(year for _, _, year in versions):
+            logger.warning('get_versions_code - listing carries no years, back to one request per year')
+            self._range_listing = False
+        else:
+            logger.info(f'{automaker} : {model} : {low}-{high} | versions without a year, one request per year')
+        return await self._get_versions_per_year(automaker, model, [str(year) for year in years])
+
+    async def _get_versions_per_year(self, automaker: str, model: str, years: list[str]) -> list[tuple[str, str, str]]:
+        # A single-year query places every version in that year, as the per-year walk always did
+        found = []
+        for year in years:
+            listing = await self._get_versions_listing(automaker, model, year, year)
+            if listing:
+                found.extend((year, name, href) for name, href, _ in listing[0])
+        return found
+
+    async def _get_versions_listing(self, automaker: str, model: str, start_year: str,
+                                    final_year: str) -> tuple[list[tuple[str, str, str | None]], bool] | None:
         response = await self._factory.get_versions(automaker, model, start_year, final_year)
 
         if response.status != 200:
             logger.warning(f'get_versions_code - unexpected status: {response.status}')
-            return {}
+            return None
 
-        if self._parser.is_error_page(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_error_page(document):
+            self._factory.report_blocked('error page')
             logger.warning('get_versions_code - error page detected')
-            return {}
+            return None
 
-        versions = self._parser.versions_code(response.content)
+        versions, paginated = self._parser.versions_listing(document)
         logger.info(
             f'{automaker} : {model} : {start_year}-{final_year} | '
             f'get_versions_code - found {len(versions)} versions'
         )
-        return versions
+        return versions, paginated
 
     async def _technical_sheet(self, code: str) -> dict:
-        response = await self._factory.get_technical_sheet(code)
+        # OCR images are bound to the last sheet opened in the session, so the sheet and its
+        # images are fetched as one unit; OCR itself runs afterwards, outside the lock.
+        async with self._session_lock:
+            response = await self._factory.get_technical_sheet(code)
 
-        if response.status != 200:
-            logger.warning(f'technical_sheet [{code}] - unexpected status: {response.status}')
-            return {}
+            if response.status != 200:
+                logger.warning(f'technical_sheet [{code}] - unexpected status: {response.status}')
+                return {}
+
+            document = HtmlDocument(response.content)
+            if self._parser.is_error_page(document):
+                self._factory.report_blocked('error page')
+                logger.warning(f'technical_sheet [{code}] - error page detected')
+                return {}
 
-        if self._parser.is_error_page(response.content):
-            logger.warning(f'technical_sheet [{code}] - error page detected')
-            return {}
+            sheet = self._parser.technical_sheet(document)
+            images = await self._fetch_ocr_images(sheet, code)
 
-        sheet = self._parser.technical_sheet(response.content)
-        sheet = await self._resolve_ocr_values(sheet, code)
+        sheet = await self._resolve_ocr_values(sheet, images, code)
+        sheet['normalized'] = normalize_sheet(sheet)
 
         logger.info(f'technical_sheet [{code}] - parsed: {sheet.get("nome", "unknown")}')
         return sheet
 
-    async def _resolve_ocr_values(self, sheet: dict, code: str) -> dict:
-        """Replace __ocr__ placeholder dicts with values extracted from anti-scraping images."""
-        for key, value in list(sheet.items()):
+    async def _fetch_ocr_images(self, sheet: dict, code: str) -> dict[str, bytes]:
+        """Download the anti-scraping image behind every __ocr__ placeholder of the sheet."""
+        images: dict[str, bytes] = {}
+        for key, value in sheet.items():
             if not isinstance(value, dict) or '__ocr__' not in value:
                 continue
 
             image_path = value['__ocr__']
-            unit = value.get('__unit__', '')
-
             image_response = await self._factory.get_image_value(image_path)
 
             if image_response.status != 200 or not isinstance(image_response.content, bytes):
@@ -204,16 +337,40 @@ class CarrosWebCrawler:
                     f'technical_sheet [{code}] - could not fetch OCR image for "{key}" '
                     f'({image_path}), status={image_response.status}'
                 )
-                sheet[key] = None
                 continue
+            images[key] = image_response.content
+
+        return images
+
+    async def _resolve_ocr_values(self, sheet: dict, images: dict[str, bytes], code: str) -> dict:
+        """Replace __ocr__ placeholder dicts with values extracted from anti-scraping images."""
+        digests = {key: OcrCache.digest(image) for key, image in images.items()}
+        known = await self._ocr_cache.get_many(list(digests.values())) if self._ocr_cache else {}
+
+        pending = [key for key in images if digests[key] not in known]
+        if self._ocr is not None:
+            results = await asyncio.gather(*self._ocr.submit_batch([images[key] for key in pending]))
+        else:
+            results = [await asyncio.to_thread(ocr_numeric_image, images[key]) for key in pending]
+        if self._ocr_cache:
+            await self._ocr_cache.put_many({digests[key]: text for key, text in zip(pending, results)})
+
+        ocr_texts = {key: known[digest] for key, digest in digests.items() if digest in known}
+        ocr_texts.update(zip(pending, results))
 
-            ocr_text = ocr_numeric_image(image_response.content)
+        for key, value in list(sheet.items()):
+            if not isinstance(value, dict) or '__ocr__' not in value:
+                continue
+
+            unit = value.get('__unit__', '')
+            ocr_text = ocr_texts.get(key)
             if ocr_text:
                 sheet[key] = f'{ocr_text} {unit}'.strip() if unit else ocr_text
             else:
-                logger.warning(
-                    f'technical_sheet [{code}] - OCR returned empty result for "{key}" ({image_path})'
-                )
+                if key in images:
+                    logger.warning(
+                        f'technical_sheet [{code}] - OCR returned empty result for "{key}" ({value["__ocr__"]})'
+                    )
                 sheet[key] = None
 
         return sheet
@@ -1,5 +1,38 @@
 import re
-from lxml import html
+from collections import Counter
+from lxml import etree
+from src.Model.Document import HtmlDocument
+
+# XPath expressions are compiled once at import time and reused for every page, row and cell
+_LINK_FONT_TEXT = etree.XPath('//a/font/text()')
+_FONT_LINKS = etree.XPath('//font/a')
+_NAME_FONTS = etree.XPath('//font[@color="darkred" and @size="4"]')
+_SPECS_TABLES = etree.XPath(
+    '//table[@border="0" and @cellspacing="1" and @cellpadding="3" and @width="100%"]'
+)
+_ROWS = etree.XPath('.//tr')
+_SECTION_HEADER_FONTS = etree.XPath('.//td[@align="center"]//font[@color="darkred" and @size="4"]')
+_LABEL_FONTS = etree.XPath('.//font[@color="darkred" and @size="3"]')
+_OCR_IMGS = etree.XPath('.//img[contains(@src, "campoImagem") or contains(@src, "imgValor")]')
+_RATING_IMGS = etree.XPath('//img[contains(@src, "estrelas")]')
+_EQUIPMENT_TABLES = etree.XPath('//table[@width="92%"]')
+_DARKRED_FONTS = etree.XPath('.//font[@color="darkred"]')
+_IMGS = etree.XPath('.//img')
+_PHOTO_HREFS = etree.XPath('//a[@rel="example_group"]/@href')
+_ROW_ANCESTOR = etree.XPath('ancestor::tr[1]')
+_SHEET_LINKS = etree.XPath('.//a[starts-with(@href, "fichadetalhe.asp?codigo")]')
+# Links to further pages of the same catalogo.asp listing
+_PAGE_LINKS = etree.XPath('//a[contains(@href, "catalogo.asp") and contains(@href, "pag")]')
+
+_WHITESPACE = re.compile(r'[\xa0\s]+')
+_SPACES = re.compile(r'\s+')
+_LEADING_SLASHES = re.compile(r'^/+')
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+def _child_cells(row) -> list:
+    # Same as row.xpath('./td') without going through the XPath engine
+    return [child for child in row if child.tag == 'td']
 
 
 class CarrosWebParser:
@@ -23,43 +56,55 @@ class CarrosWebParser:
     # Catalog parsers                                                       #
     # ------------------------------------------------------------------ #
 
-    def is_error_page(self, content: str) -> bool:
-        tree = html.fromstring(content)
-        return any('Ocorreu um erro.' in text for text in tree.xpath('//text()'))
+    def is_error_page(self, content: str | HtmlDocument) -> bool:
+        return HtmlDocument.of(content).has_text('Ocorreu um erro.', hint='Ocorreu um erro')
 
-    def automakers(self, content: str) -> list[str]:
-        tree = html.fromstring(content)
-        automakers = tree.xpath('//a/font/text()')
+    def automakers(self, content: str | HtmlDocument) -> list[str]:
+        tree = HtmlDocument.of(content).tree
+        automakers = _LINK_FONT_TEXT(tree)
         return [m.strip().lower() for m in automakers if m.strip() and m.strip().lower() not in self._words_remove]
 
-    def models(self, content: str) -> list[str]:
-        tree = html.fromstring(content)
-        models = tree.xpath('//a/font/text()')
+    def models(self, content: str | HtmlDocument) -> list[str]:
+        tree = HtmlDocument.of(content).tree
+        models = _LINK_FONT_TEXT(tree)
         return [m.strip().lower() for m in models if m.strip() and m.strip().lower() not in self._words_remove]
 
-    def years(self, content: str) -> list[str]:
-        tree = html.fromstring(content)
-        years = tree.xpath('//a/font/text()')
+    def years(self, content: str | HtmlDocument) -> list[str]:
+        tree = HtmlDocument.of(content).tree
+        years = _LINK_FONT_TEXT(tree)
         return [y.strip().lower() for y in years if y.strip() and y.strip().lower() not in self._words_remove]
 
-    def versions_code(self, content: str) -> dict:
-        tree = html.fromstring(content)
-        links = tree.xpath('//font/a')
-        versions = {}
-        for link in links:
+    def versions_listing(self, content: str | HtmlDocument) -> tuple[list[tuple[str, str, str | None]], bool]:
+        """Versions of a multi-year catalogo.asp listing as (name, href, year) tuples.
+
+        The year is the last four-digit year in the link text or, failing that, in the text
+        of its table row when the row holds no other version (so '2019/2020' gives the model
+        year); it is None otherwise. The flag tells whether the listing links to further pages.
+        """
+        tree = HtmlDocument.of(content).tree
+        versions: list[tuple[str, str, str | None]] = []
+        seen: set[str] = set()
+        for link in _FONT_LINKS(tree):
             href = link.get('href', '')
-            text = link.text_content().strip()
-            text = re.sub(r'\s+', ' ', text).strip()
-            if href and text and href.startswith('fichadetalhe.asp?codigo'):
-                versions[text] = href
-        return versions
+            text = _SPACES.sub(' ', link.text_content()).strip()
+            if not (href and text and href.startswith('fichadetalhe.asp?codigo')) or href in seen:
+                continue
+            seen.add(href)
+
+            years = _YEAR.findall(text)
+            if not years:
+                row = _ROW_ANCESTOR(link)
+                if row and len(_SHEET_LINKS(row[0])) == 1:
+                    years = _YEAR.findall(' '.join(row[0].itertext()))
+            versions.append((text, href, years[-1] if years else None))
+        return versions, bool(_PAGE_LINKS(tree))
 
     # ------------------------------------------------------------------ #
     # Technical sheet parser                                               #
     # ------------------------------------------------------------------ #
 
-    def technical_sheet(self, content: str) -> dict:
-        tree = html.fromstring(content)
+    def technical_sheet(self, content: str | HtmlDocument) -> dict:
+        tree = HtmlDocument.of(content).tree
         result = {
             'nome': self._extract_name(tree),
             **self._extract_specs(tree),
@@ -69,11 +114,10 @@ class CarrosWebParser:
         return result
 
     def _clean_text(self, text: str) -> str:
-        return re.sub(r'[\xa0\s]+', ' ', text).strip()
+        return _WHITESPACE.sub(' ', text).strip()
 
     def _extract_name(self, tree) -> str:
-        fonts = tree.xpath('//font[@color="darkred" and @size="4"]')
-        for font in fonts:
+        for font in _NAME_FONTS(tree):
             text = self._clean_text(font.text_content())
             if text and text.upper() not in self._section_headers and \
                     text not in ('Ficha Técnica', 'Equipamentos', 'Fotos'):
@@ -85,25 +129,23 @@ class CarrosWebParser:
         # row_context = first pair's label when a row contains two pairs — used to
         # disambiguate labels that repeat within the same section (e.g. "Elemento
         # elástico" appears twice in SUSPENSÃO, once for dianteiro and once for traseiro).
-        Quad = tuple  # (section: str, label: str, value, context: str | None)
-        quads: list[Quad] = []
+        # Label counts are accumulated in the same pass over the rows.
+        quads: list[tuple[str, str, object, str | None]] = []
+        label_counts: Counter = Counter()
+        section_label_counts: Counter = Counter()
         current_section = 'Geral'
 
-        specs_table = tree.xpath(
-            '//table[@border="0" and @cellspacing="1" and @cellpadding="3" and @width="100%"]'
-        )
+        specs_table = _SPECS_TABLES(tree)
         if not specs_table:
             return {}
 
-        for row in specs_table[0].xpath('.//tr'):
-            cells = list(row.xpath('./td'))
+        for row in _ROWS(specs_table[0]):
+            cells = _child_cells(row)
             if not cells:
                 continue
 
             # Section header: centred td with a darkred size-4 font
-            header_fonts = row.xpath(
-                './/td[@align="center"]//font[@color="darkred" and @size="4"]'
-            )
+            header_fonts = _SECTION_HEADER_FONTS(row)
             if header_fonts:
                 section_text = self._clean_text(header_fonts[0].text_content())
                 if section_text and section_text.upper() in self._section_headers:
@@ -113,17 +155,18 @@ class CarrosWebParser:
             # Collect valid label-value pairs from this row (preserving left→right order)
             row_pairs: list[tuple[str, object]] = []
             i = 0
-            while i < len(cells):
+            n_cells = len(cells)
+            while i < n_cells:
                 label_td = cells[i]
                 if label_td.get('align') != 'right' or label_td.get('bgcolor') != '#ffffff':
                     i += 1
                     continue
-                label_fonts = label_td.xpath('.//font[@color="darkred" and @size="3"]')
+                label_fonts = _LABEL_FONTS(label_td)
                 if not label_fonts:
                     i += 1
                     continue
                 label = self._clean_text(label_fonts[0].text_content())
-                if not label or i + 1 >= len(cells):
+                if not label or i + 1 >= n_cells:
                     i += 1
                     continue
                 value_td = cells[i + 1]
@@ -137,15 +180,14 @@ class CarrosWebParser:
 
             # When a row has two pairs, the second pair uses the first pair's
             # label as row_context to resolve within-section duplicates.
+            two_pairs = len(row_pairs) == 2
             for idx, (label, value) in enumerate(row_pairs):
-                context = row_pairs[0][0] if idx == 1 and len(row_pairs) == 2 else None
+                context = row_pairs[0][0] if idx == 1 and two_pairs else None
                 quads.append((current_section, label, value, context))
+                label_counts[label] += 1
+                section_label_counts[(current_section, label)] += 1
 
         # ---- Duplicate resolution ----
-        from collections import Counter
-        label_counts = Counter(label for _, label, _, _ in quads)
-        section_label_counts = Counter((s, label) for s, label, _, _ in quads)
-
         specs: dict = {}
         counter: Counter = Counter()
         for section, label, value, context in quads:
@@ -174,12 +216,12 @@ class CarrosWebParser:
 
     def _parse_cell_value(self, td) -> str | dict | None:
         # Values rendered as images to prevent scraping (e.g. deslocamento, peso, comprimento)
-        ocr_imgs = td.xpath('.//img[contains(@src, "campoImagem") or contains(@src, "imgValor")]')
+        ocr_imgs = _OCR_IMGS(td)
         if ocr_imgs:
             raw_src = ocr_imgs[0].get('src', '')
             # Normalise: '..\campoImagem\imgValor1.asp' → 'campoImagem/imgValor1.asp'
             img_path = raw_src.replace('\\', '/').lstrip('./').lstrip('.')
-            img_path = re.sub(r'^/+', '', img_path)
+            img_path = _LEADING_SLASHES.sub('', img_path)
             # The text after the img element is the unit (e.g. "cm³", "kg", "mm")
             tail = self._clean_text(ocr_imgs[0].tail or '')
             return {'__ocr__': img_path, '__unit__': tail}
@@ -189,10 +231,10 @@ class CarrosWebParser:
 
     def _extract_reader_rating(self, tree) -> str | None:
         # The rating is an <img src="*estrelas*"> followed by tail text like "\xa08,5"
-        imgs = tree.xpath('//img[contains(@src, "estrelas")]')
+        imgs = _RATING_IMGS(tree)
         if not imgs:
             return None
-        tail = re.sub(r'[\xa0\s]+', '', imgs[0].tail or '').strip()
+        tail = _WHITESPACE.sub('', imgs[0].tail or '').strip()
         return tail or None
 
     # ------------------------------------------------------------------ #
@@ -204,7 +246,7 @@ class CarrosWebParser:
         current_category = 'Geral'
 
         # The equipment list is rendered inside a nested <table width="92%">
-        equip_tables = tree.xpath('//table[@width="92%"]')
+        equip_tables = _EQUIPMENT_TABLES(tree)
         if not equip_tables:
             return equipment
 
@@ -216,24 +258,25 @@ class CarrosWebParser:
                 return
             first = cells[0]
             # Category header: single cell with colspan=4 containing a darkred font
-            if first.get('colspan') in ('4', '3') and first.xpath('.//font[@color="darkred"]'):
+            if first.get('colspan') in ('4', '3') and _DARKRED_FONTS(first):
                 cat_text = self._clean_text(first.text_content())
                 if cat_text:
                     current_category = cat_text
                     equipment.setdefault(current_category, [])
                 return
             # Equipment item pairs: (img_cell, name_cell)
-            equipment.setdefault(current_category, [])
+            items = equipment.setdefault(current_category, [])
             i = 0
             while i + 1 < len(cells):
                 img_cell, name_cell = cells[i], cells[i + 1]
-                imgs = img_cell.xpath('.//img')
+                imgs = _IMGS(img_cell)
                 if imgs:
                     img_src = (imgs[0].get('src') or '').lower()
-                    name = self._clean_text(name_cell.text_content())
-                    if name and ('verde.gif' in img_src or 'amar.gif' in img_src):
-                        equip_type = 'serie' if 'verde.gif' in img_src else 'opcional'
-                        equipment[current_category].append({'nome': name, 'tipo': equip_type})
+                    is_serie = 'verde.gif' in img_src
+                    if is_serie or 'amar.gif' in img_src:
+                        name = self._clean_text(name_cell.text_content())
+                        if name:
+                            items.append({'nome': name, 'tipo': 'serie' if is_serie else 'opcional'})
                 i += 2
 
         # Malformed HTML causes some <td> elements to be direct children of the <table>
@@ -244,7 +287,7 @@ class CarrosWebParser:
                 if orphaned:
                     process_cells(orphaned)
                     orphaned = []
-                process_cells(list(child.xpath('./td')))
+                process_cells(_child_cells(child))
             elif child.tag == 'td':
                 orphaned.append(child)
 
@@ -258,7 +301,7 @@ class CarrosWebParser:
     # ------------------------------------------------------------------ #
 
     def _extract_photos(self, tree) -> list[str]:
-        hrefs = tree.xpath('//a[@rel="example_group"]/@href')
+        hrefs = _PHOTO_HREFS(tree)
         seen: set[str] = set()
         result: list[str] = []
         for href in hrefs:
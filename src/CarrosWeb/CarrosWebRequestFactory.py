@@ -3,16 +3,29 @@ from src.Model.Response import Response
 
 
 class CarrosWebRequestFactory:
+    HOST = 'www.carrosnaweb.com.br'
+
     def __init__(self, network: NetworkManager):
         self._network = network
-        self._base_url = 'https://www.carrosnaweb.com.br'
-        self._headers = {'Host': 'www.carrosnaweb.com.br'}
+        self._base_url = f'https://{self.HOST}'
+        self._headers = {'Host': self.HOST}
+
+    def report_blocked(self, reason: str) -> None:
+        self._network.report_blocked(self.HOST, reason)
+
+    @staticmethod
+    def _is_usable(response: Response) -> bool:
+        # Error pages come back as 200s; this is the raw marker CarrosWebParser.is_error_page checks
+        return 'Ocorreu um erro' not in response.content
 
     async def get_automakers(self) -> Response:
         return await self._network.get(
             url=f'{self._base_url}/avancada.asp',
             headers=self._headers,
-            use_cffi=True
+            use_cffi=True,
+            cache='catalog',
+            validate=self._is_usable,
+            kind='catalog',
         )
 
     async def get_models(self, automaker: str) -> Response:
@@ -21,7 +34,10 @@ class CarrosWebRequestFactory:
             url=f'{self._base_url}/catalogofabricante.asp',
             params=params,
             headers=self._headers,
-            use_cffi=True
+            use_cffi=True,
+            cache='catalog',
+            validate=self._is_usable,
+            kind='catalog',
         )
 
     async def get_years(self, automaker: str, model: str) -> Response:
@@ -30,7 +46,10 @@ class CarrosWebRequestFactory:
             url=f'{self._base_url}/catalogomodelo.asp',
             params=params,
             headers=self._headers,
-            use_cffi=True
+            use_cffi=True,
+            cache='catalog',
+            validate=self._is_usable,
+            kind='catalog',
         )
 
     async def get_versions(self, automaker: str, model: str, start_year: str, final_year: str) -> Response:
@@ -39,7 +58,10 @@ class CarrosWebRequestFactory:
             url=f'{self._base_url}/catalogo.asp',
             params=params,
             headers=self._headers,
-            use_cffi=True
+            use_cffi=True,
+            cache='catalog',
+            validate=self._is_usable,
+            kind='catalog',
         )
 
     async def get_technical_sheet(self, code: str) -> Response:
@@ -48,7 +70,9 @@ class CarrosWebRequestFactory:
             url=f'{self._base_url}/fichadetalhe.asp',
             params=params,
             headers=self._headers,
-            use_cffi=True
+            use_cffi=True,
+            validate=self._is_usable,
+            kind='sheet',
         )
 
     async def get_image_value(self, image_path: str) -> Response:
@@ -0,0 +1,36 @@
+import asyncio
+from src.Logger import get_logger
+from src.Common.DatabaseRepository import DatabaseRepository
+
+
+class Backlog:
+    """Bounds the todo jobs of a source waiting between the catalog and the sheet workers.
+
+    The catalog calls :meth:`wait` before queueing more jobs; while ``limit`` or more are
+    still pending it sleeps in ``poll_interval`` steps, so a fast catalog walk cannot run
+    arbitrarily far ahead of the workers. Concurrent callers wait in turn, so only one
+    of them polls the queue at a time. A ``limit`` of 0 disables the bound.
+    """
+
+    def __init__(self, db: DatabaseRepository, source: str, limit: int = 1000, poll_interval: float = 5.0):
+        self._db = db
+        self._source = source
+        self._limit = limit
+        self._poll_interval = poll_interval
+        self._lock = asyncio.Lock()
+        self._logger = get_logger('Backlog', reference=source)
+
+    async def wait(self) -> None:
+        if self._limit <= 0:
+            return
+
+        async with self._lock:
+            pending = await self._db.count_pending(self._source)
+            if pending < self._limit:
+                return
+
+            self._logger.info(f'backlog - {pending} pending jobs (limit {self._limit}), catalog paused')
+            while pending >= self._limit:
+                await asyncio.sleep(self._poll_interval)
+                pending = await self._db.count_pending(self._source)
+            self._logger.info(f'backlog - {pending} pending jobs, catalog resumed')
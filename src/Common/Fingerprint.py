@@ -0,0 +1,13 @@
+import json
+import hashlib
+
+
+def fingerprint(data) -> str:
+    """SHA-256 of parsed listing data in a canonical JSON form.
+
+    Hashing what the parser extracted rather than the raw HTML keeps the fingerprint
+    stable across ads, tokens and layout noise. Dict key order is normalized; callers
+    sort lists whose order does not matter.
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
@@ -0,0 +1,135 @@
+import json
+import time
+import zlib
+import sqlite3
+from pathlib import Path
+from urllib.parse import urlencode
+from dataclasses import dataclass
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from src.Model.Response import Response
+
+# Response headers kept with a cached body
+_STORED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+
+@dataclass
+class CachedPage:
+    url: str
+    content: str
+    headers: dict[str, str]
+    stored_at: float
+
+    @property
+    def etag(self) -> str | None:
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.headers.get('last-modified')
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def to_response(self, response_time: float = 0.0) -> Response:
+        return Response(
+            url=URL(self.url),
+            status=200,
+            response_time=response_time,
+            content=self.content,
+            headers=CIMultiDictProxy(CIMultiDict(self.headers)),
+        )
+
+
+class HttpCache:
+    """On-disk cache of text pages, in a single sqlite file with zlib-compressed bodies.
+
+    Entries are keyed by method, URL and query parameters. Each request names a cache
+    class (e.g. ``'catalog'``) whose entry in ``ttls`` says for how many seconds a stored
+    page is served without touching the network; past that the page is revalidated with
+    If-None-Match / If-Modified-Since when the server sent an ETag or Last-Modified.
+    Requests without a class, or with a class not in ``ttls``, are never cached. Entries
+    not refreshed for ``max_age`` seconds are pruned when the cache is opened. Stores and
+    refreshes are committed every ``commit_every`` writes and on :meth:`close`.
+    """
+
+    def __init__(self, path: str | Path, ttls: dict[str, float], max_age: float = 7 * 24 * 3600,
+                 commit_every: int = 64):
+        self._ttls = ttls
+        self._commit_every = commit_every
+        self._uncommitted = 0
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' key TEXT PRIMARY KEY, url TEXT NOT NULL, headers TEXT NOT NULL,'
+            ' body BLOB NOT NULL, stored_at REAL NOT NULL)'
+        )
+        self._conn.execute('DELETE FROM pages WHERE stored_at < ?', (time.time() - max_age,))
+        self._conn.commit()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def __enter__(self) -> 'HttpCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def key(method: str, url: str, params: dict | None = None) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        return f'{method.upper()} {url}?{query}' if query else f'{method.upper()} {url}'
+
+    def ttl(self, cache_class: str | None) -> float | None:
+        return self._ttls.get(cache_class) if cache_class else None
+
+    def get(self, key: str) -> CachedPage | None:
+        row = self._conn.execute('SELECT url, headers, body, stored_at FROM pages WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        url, headers, body, stored_at = row
+        return CachedPage(url=url, content=zlib.decompress(body).decode('utf-8'),
+                          headers=json.loads(headers), stored_at=stored_at)
+
+    def put(self, key: str, response: Response) -> None:
+        headers = {name: response.headers[name] for name in _STORED_HEADERS
+                   if response.headers and name in response.headers}
+        body = zlib.compress(response.content.encode('utf-8'), 6)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO pages (key, url, headers, body, stored_at) VALUES (?, ?, ?, ?, ?)',
+            (key, str(response.url), json.dumps(headers), body, time.time()),
+        )
+        self._written()
+
+    def touch(self, key: str) -> None:
+        # A 304 proves the stored page is still current, so its TTL starts over
+        self._conn.execute('UPDATE pages SET stored_at = ? WHERE key = ?', (time.time(), key))
+        self._written()
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def _written(self) -> None:
+        self._uncommitted += 1
+        if self._uncommitted >= self._commit_every:
+            self.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'lookups': lookups,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,66 @@
+import os
+import uuid
+import socket
+import asyncio
+from src.Logger import get_logger
+from src.Common.DatabaseRepository import DatabaseRepository
+
+logger = get_logger('JobLease')
+
+
+def new_worker_id(source: str) -> str:
+    return f'{source}@{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class JobLease:
+    """Keeps the leases of a worker's in-flight jobs alive while they are being processed.
+
+    Usage::
+
+        async with JobLease(db, worker_id, jobs) as lease:
+            for job in jobs:
+                ...
+                lease.finish(job['_id'])
+
+    A background task renews the leases every ``lease_seconds / 3``. If the block exits with
+    an exception (including cancellation on shutdown), every job not yet finished is
+    returned to todo so another worker can pick it up right away.
+    """
+
+    def __init__(self, db: DatabaseRepository, worker_id: str, jobs: list[dict] | None = None,
+                 lease_seconds: int = 300):
+        self._db = db
+        self._worker_id = worker_id
+        self._lease_seconds = lease_seconds
+        self._pending = {job['_id'] for job in jobs or []}
+        self._task: asyncio.Task | None = None
+
+    def add(self, jobs: list[dict]) -> None:
+        self._pending.update(job['_id'] for job in jobs)
+
+    def finish(self, job_id) -> None:
+        self._pending.discard(job_id)
+
+    async def __aenter__(self) -> 'JobLease':
+        self._task = asyncio.create_task(self._heartbeat())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        if exc_type is not None and self._pending:
+            released = await self._db.release_jobs(list(self._pending), self._worker_id)
+            logger.warning(f'{self._worker_id} - interrupted, released {released} in-flight jobs back to todo')
+
+    async def _heartbeat(self) -> None:
+        interval = max(self._lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._db.heartbeat(list(self._pending), self._worker_id, self._lease_seconds)
+            except Exception as e:
+                logger.error(f'{self._worker_id} - heartbeat failed: {e}')
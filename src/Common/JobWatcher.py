@@ -0,0 +1,80 @@
+import asyncio
+from pymongo.errors import OperationFailure, PyMongoError
+from src.Logger import get_logger
+from src.Common.DatabaseRepository import DatabaseRepository
+
+
+class JobWatcher:
+    """Tells an idle worker pool when new todo jobs may be waiting for its source.
+
+    While the block is open a change stream on the ``vehicle`` collection follows the
+    inserts of todo jobs for ``source`` and :meth:`wait` returns as soon as one arrives
+    (or after ``max_interval`` at the latest, which also catches jobs requeued by lease
+    reaping). Change streams need a replica set; on a standalone server the stream fails
+    with ``OperationFailure`` and :meth:`wait` falls back to sleeping with exponential
+    backoff from ``min_interval`` to ``max_interval``, reset by :meth:`reset`. Either way
+    :meth:`wake` ends the current wait early.
+    """
+
+    def __init__(self, db: DatabaseRepository, source: str, min_interval: float = 1.0, max_interval: float = 60.0):
+        self._db = db
+        self._source = source
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._delay = min_interval
+        self._event = asyncio.Event()
+        self._streaming = False
+        self._task: asyncio.Task | None = None
+        self._logger = get_logger('JobWatcher', reference=source)
+
+    async def __aenter__(self) -> 'JobWatcher':
+        self._task = asyncio.create_task(self._watch())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def wait(self) -> None:
+        if self._streaming:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=self._max_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._event.clear()
+            return
+
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=self._delay)
+        except asyncio.TimeoutError:
+            self._delay = min(self._delay * 2, self._max_interval)
+        self._event.clear()
+
+    def wake(self) -> None:
+        self._event.set()
+
+    def reset(self) -> None:
+        self._delay = self._min_interval
+
+    async def _watch(self) -> None:
+        pipeline = [{'$match': {
+            'operationType': 'insert',
+            'fullDocument.source': self._source,
+            'fullDocument.status': 'todo',
+        }}]
+        try:
+            async with self._db.db.vehicle.watch(pipeline) as stream:
+                self._streaming = True
+                self._logger.info('watching the job queue through a change stream')
+                async for _ in stream:
+                    self._event.set()
+        except OperationFailure as e:
+            self._logger.info(f'change streams unavailable ({e.code}), polling with backoff instead')
+        except PyMongoError as e:
+            self._logger.warning(f'change stream closed: {e}, polling with backoff instead')
+        finally:
+            self._streaming = False
+            # Wake a waiter blocked on the stream so it switches to polling
+            self._event.set()
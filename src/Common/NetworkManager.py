@@ -1,13 +1,19 @@
 import re
+import random
+import asyncio
 import timeit
 import aiohttp
 import curl_cffi
 import fake_useragent
 from yarl import URL
-from typing import Any
+from typing import Any, Callable
 from aiohttp import ClientSession
-from contextlib import asynccontextmanager
-from src.Model.Response import Response
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from src.Model.Response import Response, ResponseRecord
+from src.Common.Pacing import HostPacer, PacingPolicy
+from src.Common.HttpCache import HttpCache
+from src.Common.PageArchive import PageArchive
 
 
 def _charset_from_headers(headers) -> str:
@@ -16,104 +22,230 @@ def _charset_from_headers(headers) -> str:
     return m.group(1) if m else 'latin-1'
 
 
+RECORD_MODES = ('off', 'metadata', 'sample')
+
+
 class NetworkManager:
+    """Shared HTTP client for the crawlers.
+
+    Response recording is opt-in. ``record='metadata'`` keeps url, status, timing and
+    size of the last ``record_limit`` responses; ``record='sample'`` does the same but
+    keeps the full ``Response`` (body included) for a ``sample_rate`` fraction of them.
+    Passing a ``responses`` list records every full response into it without bound and
+    is meant for debugging sessions only.
+
+    With an ``HttpCache``, ``get`` calls that name a cache class are served from disk while
+    fresh and revalidated with a conditional GET once stale; see :meth:`get`. With a
+    ``PageArchive``, every page fetched from the network by a ``get`` that names a ``kind``
+    is appended to it.
+    """
+
     def __init__(self, session: ClientSession, cffi_session: curl_cffi.AsyncSession | None = None,
-        responses: list | None = None):
+        responses: list | None = None, record: str = 'off', record_limit: int = 1000,
+        sample_rate: float = 0.01, cache: HttpCache | None = None, archive: PageArchive | None = None):
+        if record not in RECORD_MODES:
+            raise ValueError(f'record must be one of {RECORD_MODES}, got {record!r}')
         self._session = session
         self._cffi_session = cffi_session or curl_cffi.AsyncSession(impersonate="chrome124")
-        self._responses = responses if responses is not None else []
+        self._record = 'full' if responses is not None else record
+        self._responses = responses if responses is not None else deque(maxlen=record_limit)
+        self._sample_rate = sample_rate
         self._ua = fake_useragent.UserAgent()
+        self._pacers: dict[str, HostPacer] = {}
+        self._cache = cache
+        self._archive = archive
 
-    async def get(self, url: str, headers: dict | None = None, params: dict | None = None,
-                  use_cffi: bool = False, proxy: str | None = None) -> Response:
-        start = timeit.default_timer()
-        if use_cffi:
-            proxies = {'https': proxy, 'http': proxy} if proxy else None
-            r = await self._cffi_session.get(url, headers=headers, params=params, proxies=proxies)
-            elapsed = timeit.default_timer() - start
-            response = Response(
-                url=URL(str(r.url)),
-                status=r.status_code,
-                response_time=elapsed,
-                cookies=r.cookies,
-                content=r.content.decode(_charset_from_headers(r.headers), errors='replace'),
-                headers=r.headers,
-            )
+    def set_pacing(self, host: str, policy: PacingPolicy) -> None:
+        self._pacers[host] = HostPacer(host, policy)
+
+    def report_blocked(self, host: str, reason: str) -> None:
+        """Signal that a response from ``host`` was a block page (CAPTCHA, error page) despite a 200."""
+        pacer = self._pacers.get(host)
+        if pacer:
+            pacer.on_block(reason)
+
+    def metrics(self) -> dict[str, dict]:
+        return {host: pacer.metrics() for host, pacer in self._pacers.items()}
+
+    def cache_stats(self) -> dict | None:
+        return self._cache.stats() if self._cache else None
+
+    @property
+    def responses(self) -> list[Response | ResponseRecord]:
+        return list(self._responses)
+
+    def _remember(self, response: Response) -> None:
+        if self._record == 'off':
+            return
+        if self._record == 'full' or (self._record == 'sample' and random.random() < self._sample_rate):
+            self._responses.append(response)
         else:
-            async with self._session.get(url, headers=headers, params=params, proxy=proxy) as r:
+            self._responses.append(ResponseRecord.of(response))
+
+    def _paced(self, url: str):
+        pacer = self._pacers.get(URL(url).host)
+        return pacer.slot() if pacer else nullcontext()
+
+    def _feedback(self, url: str, status: int) -> None:
+        pacer = self._pacers.get(URL(url).host)
+        if pacer is None:
+            return
+        if status in (200, 304):
+            pacer.on_success()
+        elif status not in (404, 410):
+            # Missing pages say nothing about how hard we are hitting the host
+            pacer.on_block(f'status {status}')
+
+    async def get(self, url: str, headers: dict | None = None, params: dict | None = None,
+                  use_cffi: bool = False, proxy: str | None = None, cache: str | None = None,
+                  validate: Callable[[Response], bool] | None = None, kind: str | None = None) -> Response:
+        """GET a text page.
+
+        ``cache`` names the cache class of the request (e.g. ``'catalog'``); without one, or
+        without an ``HttpCache`` that has a TTL for it, the page is always fetched. A fresh
+        cached page is returned without any request. A stale one is revalidated with its
+        ETag / Last-Modified, and a 304 serves the stored body. Only 200 responses that
+        pass ``validate`` are stored, so block pages served with a 200 never are.
+
+        ``kind`` (e.g. ``'catalog'``, ``'sheet'``) labels the page in the archive; the same
+        ``validate`` rule decides what gets archived.
+        """
+        ttl = self._cache.ttl(cache) if self._cache else None
+        if ttl is None:
+            response = await self._get(url, headers, params, use_cffi, proxy)
+            await self._archive_page(url, response, kind, validate)
+            return response
+
+        key = HttpCache.key('GET', url, params)
+        page = self._cache.get(key)
+        if page and page.age() < ttl:
+            self._cache.hits += 1
+            return page.to_response()
+
+        if page and (page.etag or page.last_modified):
+            headers = dict(headers or {})
+            if page.etag:
+                headers['If-None-Match'] = page.etag
+            if page.last_modified:
+                headers['If-Modified-Since'] = page.last_modified
+        response = await self._get(url, headers, params, use_cffi, proxy)
+        await self._archive_page(url, response, kind, validate)
+
+        if response.status == 304 and page:
+            self._cache.revalidated += 1
+            self._cache.touch(key)
+            return page.to_response(response.response_time)
+
+        self._cache.misses += 1
+        if response.status == 200 and isinstance(response.content, str) and (validate is None or validate(response)):
+            self._cache.put(key, response)
+        return response
+
+    async def _archive_page(self, url: str, response: Response, kind: str | None,
+                            validate: Callable[[Response], bool] | None) -> None:
+        if self._archive is None or kind is None or response.status != 200 or not isinstance(response.content, str):
+            return
+        if validate is None or validate(response):
+            # Compression and the segment write run in a worker thread, off the event loop
+            await asyncio.to_thread(self._archive.append, str(response.url), URL(url).host, kind,
+                                    response.status, response.content)
+
+    async def _get(self, url: str, headers: dict | None, params: dict | None, use_cffi: bool,
+                   proxy: str | None) -> Response:
+        async with self._paced(url):
+            start = timeit.default_timer()
+            if use_cffi:
+                proxies = {'https': proxy, 'http': proxy} if proxy else None
+                r = await self._cffi_session.get(url, headers=headers, params=params, proxies=proxies)
                 elapsed = timeit.default_timer() - start
                 response = Response(
-                    url=r.url,
-                    status=r.status,
+                    url=URL(str(r.url)),
+                    status=r.status_code,
                     response_time=elapsed,
                     cookies=r.cookies,
-                    content=await r.text(errors='replace'),
+                    content=r.content.decode(_charset_from_headers(r.headers), errors='replace'),
                     headers=r.headers,
                 )
+            else:
+                async with self._session.get(url, headers=headers, params=params, proxy=proxy) as r:
+                    elapsed = timeit.default_timer() - start
+                    response = Response(
+                        url=r.url,
+                        status=r.status,
+                        response_time=elapsed,
+                        cookies=r.cookies,
+                        content=await r.text(errors='replace'),
+                        headers=r.headers,
+                    )
 
-        self._responses.append(response)
+        self._feedback(url, response.status)
+        self._remember(response)
         return response
 
     async def post(self, url: str, headers: dict | None = None, params: dict | None = None,
                    data: Any | None = None, json: dict | None = None,
                    use_cffi: bool = False, proxy: str | None = None) -> Response:
-        start = timeit.default_timer()
-        if use_cffi:
-            proxies = {'https': proxy, 'http': proxy} if proxy else None
-            r = await self._cffi_session.post(url, headers=headers, params=params, data=data, json=json,
-                                              proxies=proxies)
-            elapsed = timeit.default_timer() - start
-            response = Response(
-                url=URL(str(r.url)),
-                status=r.status_code,
-                response_time=elapsed,
-                cookies=r.cookies,
-                content=r.content.decode(_charset_from_headers(r.headers), errors='replace'),
-                headers=r.headers,
-            )
-        else:
-            async with self._session.post(url, headers=headers, params=params, data=data, json=json,
-                                          proxy=proxy) as r:
+        async with self._paced(url):
+            start = timeit.default_timer()
+            if use_cffi:
+                proxies = {'https': proxy, 'http': proxy} if proxy else None
+                r = await self._cffi_session.post(url, headers=headers, params=params, data=data, json=json,
+                                                  proxies=proxies)
                 elapsed = timeit.default_timer() - start
                 response = Response(
-                    url=r.url,
-                    status=r.status,
+                    url=URL(str(r.url)),
+                    status=r.status_code,
                     response_time=elapsed,
                     cookies=r.cookies,
-                    content=await r.text(errors='replace'),
+                    content=r.content.decode(_charset_from_headers(r.headers), errors='replace'),
                     headers=r.headers,
                 )
+            else:
+                async with self._session.post(url, headers=headers, params=params, data=data, json=json,
+                                              proxy=proxy) as r:
+                    elapsed = timeit.default_timer() - start
+                    response = Response(
+                        url=r.url,
+                        status=r.status,
+                        response_time=elapsed,
+                        cookies=r.cookies,
+                        content=await r.text(errors='replace'),
+                        headers=r.headers,
+                    )
 
-        self._responses.append(response)
+        self._feedback(url, response.status)
+        self._remember(response)
         return response
 
     async def get_bytes(self, url: str, headers: dict | None = None, params: dict | None = None,
                         use_cffi: bool = False, proxy: str | None = None) -> Response:
-        start = timeit.default_timer()
-        if use_cffi:
-            proxies = {'https': proxy, 'http': proxy} if proxy else None
-            r = await self._cffi_session.get(url, headers=headers, params=params, proxies=proxies)
-            elapsed = timeit.default_timer() - start
-            response = Response(
-                url=URL(str(r.url)),
-                status=r.status_code,
-                response_time=elapsed,
-                cookies=r.cookies,
-                content=r.content,
-                headers=r.headers,
-            )
-        else:
-            async with self._session.get(url, headers=headers, params=params, proxy=proxy) as r:
+        async with self._paced(url):
+            start = timeit.default_timer()
+            if use_cffi:
+                proxies = {'https': proxy, 'http': proxy} if proxy else None
+                r = await self._cffi_session.get(url, headers=headers, params=params, proxies=proxies)
                 elapsed = timeit.default_timer() - start
                 response = Response(
-                    url=r.url,
-                    status=r.status,
+                    url=URL(str(r.url)),
+                    status=r.status_code,
                     response_time=elapsed,
                     cookies=r.cookies,
-                    content=await r.read(),
+                    content=r.content,
                     headers=r.headers,
                 )
-        self._responses.append(response)
+            else:
+                async with self._session.get(url, headers=headers, params=params, proxy=proxy) as r:
+                    elapsed = timeit.default_timer() - start
+                    response = Response(
+                        url=r.url,
+                        status=r.status,
+                        response_time=elapsed,
+                        cookies=r.cookies,
+                        content=await r.read(),
+                        headers=r.headers,
+                    )
+        self._feedback(url, response.status)
+        self._remember(response)
         return response
 
     def random_ua(self) -> str:
@@ -121,10 +253,10 @@ class NetworkManager:
 
     @staticmethod
     @asynccontextmanager
-    async def create(cffi_impersonate: str = "chrome124"):
+    async def create(cffi_impersonate: str = "chrome124", **options):
         async with aiohttp.ClientSession() as session:
             cffi_session = curl_cffi.AsyncSession(impersonate=cffi_impersonate)
             try:
-                yield NetworkManager(session, cffi_session)
+                yield NetworkManager(session, cffi_session, **options)
             finally:
                 await cffi_session.close()
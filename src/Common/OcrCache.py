@@ -0,0 +1,72 @@
+import hashlib
+from collections import OrderedDict
+from src.Common.DatabaseRepository import DatabaseRepository
+
+
+class OcrCache:
+    """OCR results keyed by the SHA-256 of the image bytes.
+
+    Lookups go through an in-memory LRU first and then the ``ocr_cache`` collection;
+    persistent hits are promoted into the LRU. Only successful recognitions are stored,
+    so a failed OCR is retried the next time the image shows up.
+    """
+
+    def __init__(self, db: DatabaseRepository | None = None, capacity: int = 4096):
+        self._db = db
+        self._capacity = capacity
+        self._lru: OrderedDict[str, str] = OrderedDict()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    async def get_many(self, digests: list[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        missing: list[str] = []
+        for digest in dict.fromkeys(digests):
+            if digest in self._lru:
+                self._lru.move_to_end(digest)
+                found[digest] = self._lru[digest]
+            else:
+                missing.append(digest)
+        self.memory_hits += len(found)
+
+        stored: dict[str, str] = {}
+        if missing and self._db is not None:
+            stored = await self._db.get_ocr_results(missing)
+            for digest, value in stored.items():
+                self._remember(digest, value)
+            found.update(stored)
+
+        self.persistent_hits += len(stored)
+        self.misses += len(missing) - len(stored)
+        return found
+
+    async def put_many(self, results: dict[str, str]) -> None:
+        results = {digest: value for digest, value in results.items() if value}
+        if not results:
+            return
+        for digest, value in results.items():
+            self._remember(digest, value)
+        if self._db is not None:
+            await self._db.save_ocr_results(results)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            'lookups': lookups,
+            'memory_hits': self.memory_hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, digest: str, value: str) -> None:
+        self._lru[digest] = value
+        self._lru.move_to_end(digest)
+        if len(self._lru) > self._capacity:
+            self._lru.popitem(last=False)
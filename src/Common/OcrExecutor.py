@@ -0,0 +1,55 @@
+import asyncio
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from src.Common.utils import ocr_backend, ocr_numeric_image, set_ocr_backend
+
+
+class OcrExecutor:
+    """Runs ``ocr_numeric_image`` in a process pool so Pillow decoding and Tesseract
+    never block the event loop.
+
+    Usage::
+
+        async with OcrExecutor(max_workers=4) as ocr:
+            futures = ocr.submit_batch([image_a, image_b])
+            values = await asyncio.gather(*futures)
+
+    The async form waits for the workers in a thread, so the rest of the teardown keeps running.
+    """
+
+    def __init__(self, max_workers: int | None = None, backend: str | None = None):
+        self._max_workers = max_workers
+        self._backend = backend
+        self._pool: ProcessPoolExecutor | None = None
+
+    def submit(self, image_bytes: bytes) -> asyncio.Future:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._max_workers, initializer=set_ocr_backend,
+                                             initargs=(self._backend or ocr_backend(),))
+        return asyncio.get_running_loop().run_in_executor(self._pool, ocr_numeric_image, image_bytes)
+
+    def submit_batch(self, images: list[bytes]) -> list[asyncio.Future]:
+        return [self.submit(image) for image in images]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            shutdown = partial(pool.shutdown, wait=True, cancel_futures=True)
+            await asyncio.get_running_loop().run_in_executor(None, shutdown)
+
+    def __enter__(self) -> 'OcrExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    async def __aenter__(self) -> 'OcrExecutor':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
@@ -0,0 +1,88 @@
+import math
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from src.Logger import get_logger
+
+logger = get_logger('Pacing')
+
+
+@dataclass
+class PacingPolicy:
+    concurrency: int = 5
+    min_delay: float = 1.0      # fastest spacing between request starts (rate ceiling)
+    max_delay: float = 60.0     # slowest spacing after repeated back-offs (rate floor)
+    initial_delay: float = 3.0
+    increase: float = 0.02      # req/s added after every clean response
+    decrease: float = 0.5       # rate multiplier when the host pushes back
+    jitter: float = 0.2
+
+    @property
+    def max_rate(self) -> float:
+        # A min_delay of 0 means no rate ceiling
+        return 1 / self.min_delay if self.min_delay > 0 else math.inf
+
+
+class HostPacer:
+    """AIMD rate controller for one host.
+
+    At most ``policy.concurrency`` requests run at once and request starts are spaced
+    ``1 / rate`` seconds apart (± jitter). Every clean response adds ``policy.increase``
+    to the rate; a block (non-200, CAPTCHA, error page) multiplies it by
+    ``policy.decrease``. Blocks reported by requests that were already in flight when
+    the last back-off happened are ignored, so a burst of CAPTCHAs halves the rate once.
+    """
+
+    def __init__(self, host: str, policy: PacingPolicy):
+        self.host = host
+        self.policy = policy
+        start = min(max(policy.initial_delay, policy.min_delay), policy.max_delay)
+        self.rate = 1 / start if start > 0 else policy.max_rate
+        self.successes = 0
+        self.blocks = 0
+        self._semaphore = asyncio.Semaphore(policy.concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+        self._last_decrease = float('-inf')
+
+    @property
+    def delay(self) -> float:
+        return 1 / self.rate
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore:
+            async with self._lock:
+                wait = self._next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                jitter = random.uniform(1 - self.policy.jitter, 1 + self.policy.jitter)
+                self._next_start = time.monotonic() + self.delay * jitter
+            yield
+
+    def on_success(self) -> None:
+        self.successes += 1
+        self.rate = min(self.rate + self.policy.increase, self.policy.max_rate)
+
+    def on_block(self, reason: str) -> None:
+        self.blocks += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.delay * self.policy.concurrency:
+            return
+
+        self._last_decrease = now
+        # An unpaced host that pushes back starts over from one request per second
+        rate = self.rate * self.policy.decrease if math.isfinite(self.rate) else 1.0
+        self.rate = max(rate, 1 / self.policy.max_delay)
+        self._next_start = max(self._next_start, now + self.delay)
+        logger.warning(f'pacing [{self.host}] - {reason}, backing off to {self.rate:.3f} req/s')
+
+    def metrics(self) -> dict:
+        return {
+            'rate': round(self.rate, 4),
+            'delay': round(self.delay, 2),
+            'successes': self.successes,
+            'blocks': self.blocks,
+        }
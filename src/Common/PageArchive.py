@@ -0,0 +1,190 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import sqlite3
+import threading
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from dataclasses import dataclass
+
+# Every record in a segment is MAGIC, the payload length, then the zlib-compressed JSON payload
+_MAGIC = b'RPG1'
+_HEADER = struct.Struct('>4sI')
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    status: int
+    kind: str
+    fetched_at: float
+    content: str
+
+
+@dataclass(frozen=True)
+class PageLocation:
+    url: str
+    segment: str
+    offset: int
+    length: int
+
+
+class ArchiveReader:
+    """Reads archived records by location through read-only memory maps of the segments.
+
+    Holds no index connection, so reparse worker processes can each open their own.
+    """
+
+    def __init__(self, directory: str | Path):
+        self._dir = Path(directory)
+        self._maps: dict[str, tuple[BinaryIO, mmap.mmap]] = {}
+
+    def read(self, location: PageLocation) -> ArchivedPage:
+        view = self._view(location.segment, location.offset + location.length)
+        record = json.loads(zlib.decompress(view[location.offset:location.offset + location.length]))
+        return ArchivedPage(url=record['url'], status=record['status'], kind=record['kind'],
+                            fetched_at=record['fetched_at'], content=record['content'])
+
+    def _view(self, segment: str, end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped[1]) < end:
+            # A segment still being written grows; map it again once a record lies past the old end
+            if mapped is not None:
+                mapped[1].close()
+                mapped[0].close()
+            handle = open(self._dir / segment, 'rb')
+            mapped = (handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[segment] = mapped
+        return mapped[1]
+
+    def close(self) -> None:
+        for handle, view in self._maps.values():
+            view.close()
+            handle.close()
+        self._maps.clear()
+
+
+class PageArchive:
+    """Append-only archive of fetched pages, for re-parsing without going back to the sites.
+
+    Pages are appended to segment files of up to ``segment_size`` bytes, one zlib-compressed
+    record each. Every process writes to its own segments, so several crawlers can share a
+    directory; the sqlite index (url, fetch time, kind, segment, offset) is the only shared
+    file. Index rows are committed every ``commit_every`` appends and on :meth:`close`.
+    Reads go through an :class:`ArchiveReader`.
+
+    :meth:`append` compresses and writes synchronously; it is thread-safe, so async callers
+    hand it to a worker thread (``asyncio.to_thread``) to keep that work off the event loop.
+    """
+
+    def __init__(self, directory: str | Path, segment_size: int = 256 * 1024 * 1024, commit_every: int = 64):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._segment_size = segment_size
+        self._commit_every = commit_every
+        # Appends come from worker threads; the lock below serializes every use of the connection
+        self._conn = sqlite3.connect(self._dir / 'index.sqlite', timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' id INTEGER PRIMARY KEY, url TEXT NOT NULL, host TEXT NOT NULL, kind TEXT NOT NULL,'
+            ' status INTEGER NOT NULL, fetched_at REAL NOT NULL,'
+            ' segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_kind ON pages (kind, host)')
+        self._conn.commit()
+        self._writer = None
+        self._segment: str | None = None
+        self._sequence = 0
+        self._uncommitted = 0
+        self._lock = threading.RLock()
+        self._reader = ArchiveReader(self._dir)
+
+    def __enter__(self) -> 'PageArchive':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Writing                                                              #
+    # ------------------------------------------------------------------ #
+
+    def append(self, url: str, host: str, kind: str, status: int, content: str) -> None:
+        fetched_at = time.time()
+        payload = zlib.compress(json.dumps({
+            'url': url, 'kind': kind, 'status': status, 'fetched_at': fetched_at, 'content': content,
+        }, ensure_ascii=False).encode('utf-8'), 6)
+
+        with self._lock:
+            writer = self._current_writer(_HEADER.size + len(payload))
+            writer.write(_HEADER.pack(_MAGIC, len(payload)))
+            offset = writer.tell()
+            writer.write(payload)
+            writer.flush()
+
+            self._conn.execute(
+                'INSERT INTO pages (url, host, kind, status, fetched_at, segment, offset, length)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, host, kind, status, fetched_at, self._segment, offset, len(payload)),
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self._commit_every:
+                self.commit()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def _current_writer(self, size: int):
+        if self._writer is None or self._writer.tell() + size > self._segment_size:
+            if self._writer is not None:
+                self._writer.close()
+            self._sequence += 1
+            self._segment = f'{time.strftime("%Y%m%d%H%M%S")}-{os.getpid()}-{self._sequence:04d}.seg'
+            self._writer = open(self._dir / self._segment, 'ab')
+        return self._writer
+
+    # ------------------------------------------------------------------ #
+    # Reading                                                              #
+    # ------------------------------------------------------------------ #
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def latest_locations(self, kind: str, host: str | None = None) -> list[PageLocation]:
+        """Where the most recent copy of every archived ``kind`` page (of ``host``) is, in segment order."""
+        query = ('SELECT url, MAX(fetched_at), segment, offset, length FROM pages'
+                 ' WHERE kind = ? AND status = 200' + (' AND host = ?' if host else '') + ' GROUP BY url')
+        # sqlite takes the bare columns of an aggregate query from the row holding the MAX
+        with self._lock:
+            self.commit()
+            rows = self._conn.execute(query, (kind, host) if host else (kind,)).fetchall()
+        locations = [PageLocation(url, segment, offset, length) for url, _, segment, offset, length in rows]
+        return sorted(locations, key=lambda location: (location.segment, location.offset))
+
+    def latest(self, kind: str, host: str | None = None) -> Iterator[ArchivedPage]:
+        for location in self.latest_locations(kind, host):
+            yield self.read(location)
+
+    def read(self, location: PageLocation) -> ArchivedPage:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            return self._reader.read(location)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._reader.close()
+            self._conn.commit()
+            self._conn.close()
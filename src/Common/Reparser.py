@@ -0,0 +1,168 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Callable, Protocol
+from concurrent.futures import ProcessPoolExecutor
+from src.Logger import get_logger
+from src.Common.SpecNormalizer import normalize_sheet
+from src.Common.PageArchive import ArchiveReader, PageArchive, PageLocation
+from src.Common.DatabaseRepository import DatabaseRepository
+
+logger = get_logger('Reparser', reference='reparse')
+
+# Fields of a stored sheet that come from the job rather than from the page
+SHEET_METADATA = ('_id', 'montadora', 'modelo', 'versao', 'ano', 'source', 'reference')
+
+# One reader per archive directory in every worker process, kept for the life of the pool
+_readers: dict[str, ArchiveReader] = {}
+
+
+class SheetSource(Protocol):
+    SOURCE: str
+
+    def sheet_reference(self, url: str) -> str | None: ...
+
+    def parse_archived_sheet(self, content: str) -> dict | None: ...
+
+    def keep_previous_values(self, sheet: dict, previous: dict) -> dict: ...
+
+
+def _parse_chunk(parse: Callable[[str], dict | None], directory: str,
+                 locations: list[PageLocation]) -> list[dict | None]:
+    """Worker side: read a chunk of archived pages straight from the segments and parse them."""
+    reader = _readers.get(directory)
+    if reader is None:
+        reader = _readers[directory] = ArchiveReader(directory)
+    return [parse(reader.read(location).content) for location in locations]
+
+
+class SheetReparser:
+    """Rewrites ``vehicle_specs`` from the archived sheet pages of one source.
+
+    The latest archived copy of every sheet is parsed again with the current parser and
+    replaces the parsed fields of each stored sheet with the same ``reference``; the job
+    metadata (montadora, modelo, versao, ano) is kept and the ``normalized`` fields are
+    recomputed. Sheets saved before the
+    ``reference`` field existed cannot be matched and are left as they are.
+
+    Parsing runs in a pool of ``processes`` worker processes (one per CPU by default),
+    ``chunk_size`` pages per task; the workers read the pages from the segments themselves,
+    so only locations and parsed sheets cross process boundaries. Chunks are collected in
+    submission order, so sheets reach the database in archive order whatever the pool does.
+    Parsed chunks go through a queue of ``queue_size`` chunks to a single writer that matches
+    and replaces sheets in batches of ``batch_size``; when the writer falls behind the queue
+    fills up and no further chunks are submitted. Progress is logged every ``progress_interval``
+    seconds.
+    """
+
+    def __init__(self, db: DatabaseRepository, archive: PageArchive, batch_size: int = 200,
+                 processes: int | None = None, chunk_size: int = 50, queue_size: int = 8,
+                 progress_interval: float = 10.0):
+        self._db = db
+        self._archive = archive
+        self._batch_size = batch_size
+        self._processes = processes
+        self._chunk_size = chunk_size
+        self._queue_size = queue_size
+        self._progress_interval = progress_interval
+
+    async def run(self, crawler: SheetSource, host: str) -> dict:
+        stats = {'pages': 0, 'rewritten': 0, 'changed': 0, 'unmatched': 0, 'unparsable': 0}
+        locations, references = [], []
+        for location in self._archive.latest_locations('sheet', host):
+            reference = crawler.sheet_reference(location.url)
+            if reference:
+                locations.append(location)
+                references.append(reference)
+        if not locations:
+            logger.info(f'reparse {crawler.SOURCE} - no archived sheets')
+            return stats
+
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        writer = asyncio.create_task(self._write(crawler, queue, stats, len(locations), started))
+        loop = asyncio.get_running_loop()
+        directory = str(self._archive.directory)
+
+        processes = self._processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            # Two chunks per worker keeps every process busy while the oldest chunk is awaited
+            window = 2 * processes
+            pending: deque[tuple[list[str], asyncio.Future]] = deque()
+            try:
+                for start in range(0, len(locations), self._chunk_size):
+                    chunk = locations[start:start + self._chunk_size]
+                    future = loop.run_in_executor(pool, _parse_chunk, crawler.parse_archived_sheet, directory, chunk)
+                    pending.append((references[start:start + self._chunk_size], future))
+                    if len(pending) >= window:
+                        await self._hand_over(pending.popleft(), queue, writer)
+                while pending:
+                    await self._hand_over(pending.popleft(), queue, writer)
+                await queue.put(None)
+                await writer
+            finally:
+                writer.cancel()
+                for _, future in pending:
+                    future.cancel()
+                await asyncio.gather(writer, *(future for _, future in pending), return_exceptions=True)
+
+        elapsed = time.monotonic() - started
+        logger.info(f'reparse {crawler.SOURCE} - {stats} in {elapsed:.1f}s '
+                    f'({stats["pages"] / max(elapsed, 1e-6):.0f} pages/s)')
+        return stats
+
+    @staticmethod
+    async def _hand_over(item: tuple[list[str], asyncio.Future], queue: asyncio.Queue, writer: asyncio.Task) -> None:
+        references, future = item
+        sheets = await future
+        put = asyncio.ensure_future(queue.put(list(zip(references, sheets))))
+        # A writer that died would never drain the queue, so its error ends the wait
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            writer.result()
+
+    async def _write(self, crawler: SheetSource, queue: asyncio.Queue, stats: dict, total: int,
+                     started: float) -> None:
+        batch: dict[str, dict | None] = {}
+        reported = started
+        while (chunk := await queue.get()) is not None:
+            for reference, sheet in chunk:
+                stats['pages'] += 1
+                if sheet is None:
+                    stats['unparsable'] += 1
+                batch[reference] = sheet
+            if len(batch) >= self._batch_size:
+                await self._rewrite(crawler, batch, stats)
+                batch = {}
+
+            now = time.monotonic()
+            if now - reported >= self._progress_interval:
+                reported = now
+                rate = stats['pages'] / (now - started)
+                logger.info(f'reparse {crawler.SOURCE} - {stats["pages"]}/{total} pages '
+                            f'({100 * stats["pages"] / total:.0f}%), {rate:.0f} pages/s, '
+                            f'{stats["changed"]} changed so far')
+        await self._rewrite(crawler, batch, stats)
+
+    async def _rewrite(self, crawler: SheetSource, parsed: dict[str, dict | None], stats: dict) -> None:
+        if not parsed:
+            return
+
+        stored = await self._db.get_sheets_by_reference(crawler.SOURCE, list(parsed))
+        matched = {sheet['reference'] for sheet in stored}
+        stats['unmatched'] += len(parsed.keys() - matched)
+
+        replacements = []
+        for previous in stored:
+            sheet = parsed[previous['reference']]
+            if sheet is None:
+                continue
+            # Duplicated sheets share one reference and page; each keeps its own OCR values
+            sheet = crawler.keep_previous_values(sheet, previous)
+            sheet = {**sheet, 'normalized': normalize_sheet(sheet)}
+            replacements.append({**sheet, **{key: previous[key] for key in SHEET_METADATA if key in previous}})
+
+        stats['rewritten'] += len(replacements)
+        stats['changed'] += await self._db.replace_sheets(replacements)
@@ -0,0 +1,74 @@
+import asyncio
+from src.Logger import get_logger
+from src.Common.DatabaseRepository import DatabaseRepository
+
+logger = get_logger('SheetWriter', reference='SheetWriter')
+
+
+class SheetWriter:
+    """Buffers technical sheets and writes them to ``vehicle_specs`` in batches.
+
+    A batch goes out with one ``save_sheets`` upsert once ``batch_size`` sheets are waiting or
+    ``flush_interval`` seconds have passed, whichever comes first. :meth:`put` waits for
+    a full batch to be written, so a producer never runs more than one batch ahead of
+    the database. Leaving the ``async with`` block flushes whatever is still buffered.
+    ``counts`` adds up how many sheets were inserted, updated or already stored unchanged.
+    """
+
+    def __init__(self, db: DatabaseRepository, batch_size: int = 50, flush_interval: float = 5.0):
+        self._db = db
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._buffer: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    async def __aenter__(self) -> 'SheetWriter':
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._timer:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        # Sheets already fetched are kept even when the crawl itself failed
+        await self.flush()
+
+    async def put(self, sheet: dict) -> None:
+        self._buffer.append(sheet)
+        if len(self._buffer) >= self._batch_size:
+            await self.flush()
+
+    @property
+    def written(self) -> int:
+        return self.counts['inserted'] + self.counts['updated']
+
+    async def flush(self) -> int:
+        async with self._lock:
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                counts = await self._db.save_sheets(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                self._buffer[:0] = batch
+                raise
+            for outcome, count in counts.items():
+                self.counts[outcome] += count
+            logger.info(f'flush - {counts["inserted"]} inserted, {counts["updated"]} updated, '
+                        f'{counts["unchanged"]} unchanged ({self.written} written in total)')
+            return counts['inserted'] + counts['updated']
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f'flush - write failed, will retry: {e}')
@@ -0,0 +1,105 @@
+import time
+import numpy as np
+import pandas as pd
+from src.Logger import get_logger
+from src.Common.DatabaseRepository import DatabaseRepository
+from src.Common.SpecNormalizer import QUANTITY, THOUSANDS, UNIT_FACTORS, field_for_key, nest
+
+logger = get_logger('SpecBackfill', reference='backfill')
+
+# Sheet fields that never hold a figure; left out of the projection to keep batches small
+_SKIPPED_FIELDS = ('equipamentos', 'fotos', 'normalized')
+
+
+def parse_quantities(values: pd.Series, field: str) -> pd.Series:
+    """Vectorized :func:`~src.Common.SpecNormalizer.parse_quantity` over one label column.
+
+    Entries that are not strings (missing labels, None from failed OCR, unresolved
+    placeholders) come out as NaN, as do numbers with a unit the field does not know.
+    """
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        # A label that only ever holds None (or nothing) is read as a float column
+        return pd.Series(np.nan, index=values.index)
+    parts = values.str.extract(QUANTITY.pattern)
+    number, unit = parts[0], parts[1].str.lower()
+
+    # Brazilian notation: with a comma, dots group thousands; without one, only "1.598"-style groups do
+    has_comma = number.str.contains(',', regex=False, na=False)
+    grouped = number.str.fullmatch(THOUSANDS.pattern, na=False)
+    cleaned = number.where(~(has_comma | grouped), number.str.replace('.', '', regex=False))
+    cleaned = cleaned.where(~has_comma, cleaned.str.replace(',', '.', regex=False))
+    numbers = pd.to_numeric(cleaned, errors='coerce')
+
+    table = UNIT_FACTORS[field.split('.')[0]]
+    factors = unit.map({name: factor for name, factor in table.items() if name is not None})
+    factors = factors.where(unit.notna(), table[None])
+    if field == 'displacement_cc':
+        # "1.0" / "1,6": engine size given in litres
+        factors = factors.where(~(unit.isna() & (numbers < 20)), 1000.0)
+    return (numbers * factors).round(2)
+
+
+def normalize_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """One column per normalized field (dotted paths for consumption), indexed like ``frame``.
+
+    Columns are resolved to fields once each and parsed a whole column at a time. When
+    several labels feed one field, the same key as in ``normalize_sheet`` wins.
+    """
+    fields: dict[str, pd.Series] = {}
+    for column in sorted(frame.columns, key=str):
+        field = field_for_key(str(column))
+        if field is None:
+            continue
+        parsed = parse_quantities(frame[column], field)
+        fields[field] = parsed if field not in fields else fields[field].combine_first(parsed)
+    return pd.DataFrame(fields, index=frame.index)
+
+
+class SpecBackfill:
+    """Fills the ``normalized`` subdocument of the sheets already in ``vehicle_specs``.
+
+    Sheets are read in ``_id`` order, ``batch_size`` at a time and without their equipment
+    and photo lists, normalized column-wise with pandas and written back with one unordered
+    ``bulk_write`` per batch. The last ``_id`` written is kept as a checkpoint under ``name``
+    (one per mode), so an interrupted run picks up where it stopped; ``restart`` starts over.
+    By default only sheets without ``normalized`` are read; ``overwrite`` recomputes every sheet.
+    """
+
+    def __init__(self, db: DatabaseRepository, batch_size: int = 5000, overwrite: bool = False,
+                 name: str = 'normalized'):
+        self._db = db
+        self._batch_size = batch_size
+        self._overwrite = overwrite
+        self._name = f'{name}-all' if overwrite else name
+
+    async def run(self, restart: bool = False) -> dict:
+        stats = {'read': 0, 'updated': 0, 'empty': 0}
+        after = None if restart else await self._db.get_checkpoint(self._name)
+        if after is not None:
+            logger.info(f'backfill - resuming after {after}')
+
+        started = time.monotonic()
+        projection = {field: 0 for field in _SKIPPED_FIELDS}
+        query = {} if self._overwrite else {'normalized': {'$exists': False}}
+        while sheets := await self._db.get_sheet_batch(query, projection, after, self._batch_size):
+            frame = pd.DataFrame.from_records(sheets, index='_id')
+            normalized = normalize_frame(frame)
+
+            updates = {}
+            for _id, row in zip(normalized.index, normalized.to_numpy(dtype=float)):
+                values = {field: float(value) for field, value in zip(normalized.columns, row) if not np.isnan(value)}
+                # Sheets without any figure still get an empty subdocument, so they are not read again
+                stats['empty'] += not values
+                updates[_id] = nest(values)
+
+            stats['read'] += len(sheets)
+            stats['updated'] += await self._db.set_normalized(updates)
+            after = sheets[-1]['_id']
+            await self._db.save_checkpoint(self._name, after)
+
+            rate = stats['read'] / max(time.monotonic() - started, 1e-6)
+            logger.info(f'backfill - {stats["read"]} sheets read, {stats["updated"]} updated ({rate:.0f} sheets/s)')
+
+        await self._db.save_checkpoint(self._name, None)
+        logger.info(f'backfill - done: {stats}')
+        return stats
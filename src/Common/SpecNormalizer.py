@@ -0,0 +1,124 @@
+import re
+from unidecode import unidecode
+
+# A number in Brazilian or plain notation ("1.598", "10,2", "1.050,5", "1.0") and the unit right after it
+QUANTITY = re.compile(r'(\d+(?:[.,]\d+)*)\s*([a-zA-Z³°]+(?:[./][a-zA-Z0-9]+)*)?')
+THOUSANDS = re.compile(r'\d{1,3}(?:\.\d{3})+')
+# "SECTION - label" prefixes and " (context)" / " (2)" suffixes added by the carrosweb parser
+_SECTION_PREFIX = re.compile(r'^(?:[A-ZÇÃÕÁÉÍÓÚÊÂ ]+|Geral) - ')
+_SUFFIX = re.compile(r'\s*\([^)]*\)$')
+
+# Folded base label -> canonical field; labels of both sources
+_LABELS = {
+    'potencia': 'power_cv',
+    'potencia maxima': 'power_cv',
+    'torque': 'torque_kgfm',
+    'torque maximo': 'torque_kgfm',
+    'cilindrada': 'displacement_cc',
+    'deslocamento': 'displacement_cc',
+    'deslocamento volumetrico': 'displacement_cc',
+    'peso': 'weight_kg',
+    'peso em ordem de marcha': 'weight_kg',
+    'peso vazio': 'weight_kg',
+    'comprimento': 'length_mm',
+}
+
+# Every field normalize_sheet can produce, as dotted paths inside ``normalized``
+NORMALIZED_FIELDS = ('power_cv', 'torque_kgfm', 'displacement_cc', 'weight_kg', 'length_mm',
+                     'consumption.city_kml', 'consumption.highway_kml')
+
+# Unit -> factor to the canonical unit of each field; None is a bare number
+UNIT_FACTORS = {
+    'power_cv': {None: 1.0, 'cv': 1.0, 'hp': 1.01387, 'bhp': 1.01387, 'kw': 1.35962},
+    'torque_kgfm': {None: 1.0, 'kgfm': 1.0, 'kgf.m': 1.0, 'mkgf': 1.0, 'nm': 1 / 9.80665, 'n.m': 1 / 9.80665},
+    'displacement_cc': {None: 1.0, 'cm³': 1.0, 'cm3': 1.0, 'cc': 1.0, 'l': 1000.0, 'litros': 1000.0},
+    'weight_kg': {None: 1.0, 'kg': 1.0, 't': 1000.0},
+    'length_mm': {None: 1.0, 'mm': 1.0, 'cm': 10.0, 'm': 1000.0},
+    'consumption': {None: 1.0, 'km/l': 1.0},
+}
+
+
+def parse_number(text: str) -> float | None:
+    """Read a number written in Brazilian notation: dots group thousands, the comma is decimal.
+
+    Without a comma, dots only group thousands when every group after them has three
+    digits, so "1.598" is 1598 while "1.0" and "3.89" stay decimals.
+    """
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    elif THOUSANDS.fullmatch(text):
+        text = text.replace('.', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_quantity(text: str, field: str) -> float | None:
+    """The first number in ``text`` converted to the canonical unit of ``field``."""
+    match = QUANTITY.search(text)
+    if match is None:
+        return None
+    number = parse_number(match.group(1))
+    unit = match.group(2).lower() if match.group(2) else None
+    factor = UNIT_FACTORS[field.split('.')[0]].get(unit)
+    if number is None or factor is None:
+        # A unit the field does not know means the label matched something else (e.g. "Peso/potência")
+        return None
+    if field == 'displacement_cc' and unit is None and number < 20:
+        # "1.0" / "1,6": engine size given in litres
+        factor = 1000.0
+    return round(number * factor, 2)
+
+
+def _fold(text: str) -> str:
+    return unidecode(text).lower().strip()
+
+
+def field_for_key(key: str) -> str | None:
+    """The normalized field (a dotted path for consumption) a sheet key feeds, if any."""
+    label = _fold(_SUFFIX.sub('', _SECTION_PREFIX.sub('', key)))
+    if label in _LABELS:
+        return _LABELS[label]
+
+    # carrosweb files consumption as "CONSUMO - Urbano", fichacompleta as "Consumo urbano"
+    if 'consumo' not in _fold(key) and not label.startswith(('urbano', 'rodoviario', 'cidade', 'estrada')):
+        return None
+    if 'urban' in label or 'cidade' in label:
+        return 'consumption.city_kml'
+    if 'rodovi' in label or 'estrada' in label:
+        return 'consumption.highway_kml'
+    return None
+
+
+def nest(values: dict[str, float]) -> dict:
+    """Turn {'power_cv': 82, 'consumption.city_kml': 10.1} into the ``normalized`` subdocument."""
+    normalized: dict = {}
+    for field, value in values.items():
+        parent, _, child = field.partition('.')
+        if child:
+            normalized.setdefault(parent, {})[child] = value
+        else:
+            normalized[field] = value
+    return normalized
+
+
+def normalize_sheet(sheet: dict) -> dict:
+    """Canonical numeric fields of a parsed technical sheet, for the ``normalized`` subdocument.
+
+    Labels of both sources are matched without their carrosweb section prefix and
+    context suffix. When several keys feed one field, the first in sorted key order with a
+    readable value wins, so the result does not depend on how a sheet was built. Values that
+    list one figure per fuel ("82 cv (G) / 84 cv (E)") give the first one. Fields whose
+    value is missing, unresolved OCR or not a number are left out.
+    """
+    values: dict[str, float] = {}
+    for key, value in sorted(sheet.items()):
+        if not isinstance(value, str) or key == 'normalized':
+            continue
+        field = field_for_key(key)
+        if field is not None and field not in values:
+            number = parse_quantity(value, field)
+            if number is not None:
+                values[field] = number
+    return nest(values)
@@ -0,0 +1,112 @@
+import time
+import asyncio
+from contextlib import nullcontext
+from typing import Awaitable, Callable
+from src.Logger import get_logger
+from src.Common.JobLease import JobLease
+from src.Common.JobWatcher import JobWatcher
+from src.Common.DatabaseRepository import DatabaseRepository
+
+
+class SheetWorkerPool:
+    """Runs ``workers`` asyncio consumers over the job queue of one source.
+
+    A single producer claims jobs in batches into a bounded in-memory queue, so the
+    number of claimed-but-idle jobs never exceeds ``2 * workers``. Each consumer hands
+    a job to ``handler`` (which returns whether a sheet was saved) and marks it as done
+    or error. Request pacing is left to the ``NetworkManager`` host policy.
+
+    By default the pool returns once the queue is empty. With ``follow`` it keeps running
+    until cancelled, waking up through a :class:`JobWatcher` when new jobs are inserted,
+    so sheets are fetched while the catalog is still being discovered. :meth:`drain` turns
+    a following pool back into one that returns once the queue is empty.
+    """
+
+    def __init__(self, db: DatabaseRepository, source: str, worker_id: str,
+                 handler: Callable[[dict], Awaitable[bool]], workers: int = 1, lease_seconds: int = 300,
+                 follow: bool = False):
+        self._db = db
+        self._source = source
+        self._worker_id = worker_id
+        self._handler = handler
+        self._workers = max(workers, 1)
+        self._lease_seconds = lease_seconds
+        self._follow = follow
+        self._draining = False
+        self._watcher: JobWatcher | None = None
+        self._logger = get_logger('SheetWorkerPool', reference=source)
+
+    async def run(self) -> int:
+        await self._db.reap_expired_leases(self._source)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._workers * 2)
+
+        watcher = self._watcher = JobWatcher(self._db, self._source) if self._follow else None
+
+        async with JobLease(self._db, self._worker_id, lease_seconds=self._lease_seconds) as lease, \
+                watcher or nullcontext():
+            consumers = [asyncio.create_task(self._consume(queue, lease)) for _ in range(self._workers)]
+            try:
+                await self._produce(queue, lease, watcher)
+                for _ in consumers:
+                    await queue.put(None)
+                results = await asyncio.gather(*consumers)
+            except BaseException:
+                for consumer in consumers:
+                    consumer.cancel()
+                await asyncio.gather(*consumers, return_exceptions=True)
+                raise
+
+        self._watcher = None
+        total = sum(results)
+        self._logger.info(f'sheet_worker - finished, {total} sheets saved by {self._workers} workers')
+        return total
+
+    def drain(self) -> None:
+        """Stop waiting for new jobs: the pool finishes what is queued and returns."""
+        self._draining = True
+        if self._watcher:
+            self._watcher.wake()
+
+    async def _produce(self, queue: asyncio.Queue, lease: JobLease, watcher: JobWatcher | None) -> None:
+        last_reap = time.monotonic()
+        while True:
+            limit = max(queue.maxsize - queue.qsize(), 1)
+            jobs = await self._db.pop_pending_jobs(self._source, limit=limit, worker_id=self._worker_id,
+                                                   lease_seconds=self._lease_seconds)
+            if not jobs:
+                if watcher is None or self._draining:
+                    self._logger.info('sheet_worker - no pending jobs, done')
+                    return
+                await watcher.wait()
+                # A long-running pool also picks up the jobs of workers that died meanwhile
+                if time.monotonic() - last_reap >= self._lease_seconds:
+                    await self._db.reap_expired_leases(self._source)
+                    last_reap = time.monotonic()
+                continue
+
+            if watcher:
+                watcher.reset()
+
+            lease.add(jobs)
+            for job in jobs:
+                await queue.put(job)
+
+    async def _consume(self, queue: asyncio.Queue, lease: JobLease) -> int:
+        saved = 0
+        while (job := await queue.get()) is not None:
+            try:
+                ok = await self._handler(job)
+            except Exception as e:
+                self._logger.error(f'sheet_worker - job {job["_id"]} [{job["reference"]}] raised: {e}')
+                ok = False
+
+            if ok:
+                await self._db.update_vehicle(str(job['_id']), {'status': 'done'})
+                saved += 1
+            else:
+                await self._db.update_vehicle(str(job['_id']), {'status': 'error'})
+                self._logger.warning(
+                    f'sheet_worker - failed job {job["_id"]} [{job["reference"]}], marked as error'
+                )
+            lease.finish(job['_id'])
+        return saved
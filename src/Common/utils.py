@@ -1,18 +1,63 @@
 import io
+import os
 import re
+import threading
 import pytesseract
 from PIL import Image
 
+try:
+    import tesserocr
+except ImportError:  # optional: needs the Tesseract development headers to build
+    tesserocr = None
+
+_WHITELIST = '0123456789.,'
+_PYTESSERACT_CONFIG = f'--psm 8 -c tessedit_char_whitelist={_WHITELIST}'
+
+_backend = os.environ.get('OCR_BACKEND', 'auto')
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def set_ocr_backend(name: str | None) -> None:
+    """Select the OCR backend: ``tesserocr``, ``pytesseract`` or ``auto`` (tesserocr when installed)."""
+    global _backend
+    if name == 'tesserocr' and tesserocr is None:
+        raise RuntimeError('OCR backend "tesserocr" requested but the tesserocr package is not installed')
+    _backend = name or 'auto'
+
+
+def ocr_backend() -> str:
+    if _backend == 'auto':
+        return 'tesserocr' if tesserocr is not None else 'pytesseract'
+    return _backend
+
 
 def ocr_numeric_image(image_bytes: bytes) -> str | None:
     """Extract a numeric value from a simple anti-scraping image using Tesseract OCR."""
     try:
         image = Image.open(io.BytesIO(image_bytes)).convert('L')
-        text = pytesseract.image_to_string(
-            image,
-            config='--psm 8 -c tessedit_char_whitelist=0123456789.,'
-        )
+        if ocr_backend() == 'tesserocr':
+            text = _recognize_tesserocr(image)
+        else:
+            text = _recognize_pytesseract(image)
         cleaned = re.sub(r'[^\d.,]', '', text.strip())
         return cleaned or None
     except Exception:
         return None
+
+
+def _recognize_pytesseract(image: Image.Image) -> str:
+    # Spawns a tesseract process and round-trips the image through temp files on every call
+    return pytesseract.image_to_string(image, config=_PYTESSERACT_CONFIG)
+
+
+def _recognize_tesserocr(image: Image.Image) -> str:
+    # One engine per process, initialised on first use (so never before a fork) and fed
+    # the raw pixel buffer directly; the lock covers callers that share it across threads.
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_WORD)
+            _engine.SetVariable('tessedit_char_whitelist', _WHITELIST)
+        _engine.SetImage(image)
+        return _engine.GetUTF8Text()
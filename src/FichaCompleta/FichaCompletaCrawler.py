@@ -1,7 +1,14 @@
 import asyncio
-import random
+from datetime import datetime
+from yarl import URL
 from src.Logger import get_logger
+from src.Model.Document import HtmlDocument
 from src.Common.DatabaseRepository import DatabaseRepository
+from src.Common.JobLease import new_worker_id
+from src.Common.Backlog import Backlog
+from src.Common.Fingerprint import fingerprint
+from src.Common.SpecNormalizer import normalize_sheet
+from src.Common.WorkerPool import SheetWorkerPool
 from src.FichaCompleta.FichaCompletaParser import FichaCompletaParser
 from src.FichaCompleta.FichaCompletaRequestFactory import FichaCompletaRequestFactory
 
@@ -9,74 +16,143 @@ logger = get_logger('FichaCompletaCrawler', reference='fichacompleta')
 
 
 class FichaCompletaCrawler:
+    SOURCE = 'fichacompleta'
+
     def __init__(self, factory: FichaCompletaRequestFactory, parser: FichaCompletaParser,
-                 db: DatabaseRepository):
+                 db: DatabaseRepository, lease_seconds: int = 300, revalidate_after: float = 24 * 3600):
         self._factory = factory
         self._parser = parser
         self._db = db
-
-    async def catalog_phase(self) -> int:
+        self._lease_seconds = lease_seconds
+        self._worker_id = new_worker_id(self.SOURCE)
+        self._revalidate_after = revalidate_after
+
+    async def catalog_phase(self, backlog: Backlog | None = None, concurrency: int = 4) -> int:
+        """Discover every version and queue a job for each one not seen before.
+
+        Automakers and models are walked as concurrent tasks, with at most ``concurrency``
+        of them fetching pages at a time; the host pacer still spaces the requests themselves.
+        Each model's versions go to the queue in one bulk write.
+
+        The walk is incremental: a model whose listing fingerprint matches the stored one is
+        left alone, and an automaker whose model list is unchanged is not descended into at
+        all until ``revalidate_after`` seconds have passed since its last full descent
+        (versions can be added to a model without its automaker's model list changing).
+        """
+        limit = asyncio.Semaphore(max(concurrency, 1))
         automakers = await self._get_automakers()
-        total_jobs = 0
-
-        for automaker in automakers:
-            models = await self._get_models(automaker)
-            if models:
-                await self._db.upsert_automaker(automaker, models)
-
-            for model in models:
-                await asyncio.sleep(random.uniform(3, 10))
-
-                versions, years = await self._get_version_years(automaker, model)
-                if not versions:
-                    continue
-
-                reference = f'{self._factory._base_url}/carros/{automaker}/{model}/'
-                await self._db.upsert_model(automaker, model, reference, versions, years)
-
-                for (version_name, href), year in zip(versions.items(), years):
-                    doc = await self._db.insert_vehicle(automaker, model, year, version_name, href)
-                    if doc:
-                        total_jobs += 1
-
-            await asyncio.sleep(random.uniform(5, 15))
+        counts = await asyncio.gather(*(self._catalog_automaker(automaker, limit, backlog)
+                                        for automaker in automakers))
+        total_jobs = sum(counts)
 
         logger.info(f'catalog_phase - {total_jobs} new jobs created')
         return total_jobs
 
-    async def sheet_worker(self) -> int:
-        total = 0
-
-        while True:
-            jobs = await self._db.pop_pending_jobs(limit=2)
-            if not jobs:
-                logger.info('sheet_worker - no pending jobs, done')
-                break
-
-            for job in jobs:
-                href = job['reference']
-                sheet = await self._technical_sheet(job['automaker'], job['model'], href)
-                if sheet:
-                    sheet.update({
-                        'montadora': job['automaker'],
-                        'modelo': job['model'],
-                        'versao': job['version'],
-                        'ano': job['year'],
-                        'source': 'fichacompleta',
-                    })
-                    await self._db.save_sheet(sheet)
-                    await self._db.update_vehicle(str(job['_id']), {'status': 'done'})
-                    total += 1
-                else:
-                    await self._db.update_vehicle(str(job['_id']), {'status': 'error'})
-                    logger.warning(f'sheet_worker - failed job {job["_id"]} [{href}], marked as error')
-
-            delay = random.uniform(10, 50)
-            logger.info(f'sheet_worker - processed {len(jobs)} jobs, sleeping {delay:.0f}s')
-            await asyncio.sleep(delay)
-
-        logger.info(f'sheet_worker - finished, {total} sheets saved')
-        return total
+    async def _catalog_automaker(self, automaker: str, limit: asyncio.Semaphore, backlog: Backlog | None) -> int:
+        try:
+            async with limit:
+                models = await self._get_models(automaker)
+            if not models:
+                return 0
+
+            listing = fingerprint(sorted(set(models)))
+            known = await self._db.get_automaker_fingerprint(automaker) or {}
+            if known.get('fingerprint') == listing:
+                descended_at = known.get('descended_at')
+                if descended_at and (datetime.now() - descended_at).total_seconds() < self._revalidate_after:
+                    logger.info(f'{automaker} | model list unchanged, skipped')
+                    return 0
+            else:
+                await self._db.upsert_automaker(automaker, models)
+            model_fingerprints = await self._db.get_model_fingerprints(automaker)
+        except Exception as e:
+            logger.error(f'{automaker} | catalog failed: {e}')
+            return 0
+
+        counts = await asyncio.gather(*(self._catalog_model(automaker, model, limit, backlog,
+                                                            model_fingerprints.get(model))
+                                        for model in models))
+        if None not in counts:
+            await self._db.mark_automaker_descended(automaker, listing)
+        return sum(count or 0 for count in counts)
+
+    async def _catalog_model(self, automaker: str, model: str, limit: asyncio.Semaphore,
+                             backlog: Backlog | None, known_fingerprint: str | None = None) -> int | None:
+        """Jobs created for the model, or None when its listing could not be checked."""
+        try:
+            async with limit:
+                listing_page = await self._get_version_years(automaker, model)
+            if listing_page is None:
+                # A CAPTCHA or a bad status; the automaker must be descended into again
+                return None
+            versions, years = listing_page
+
+            listing = fingerprint(sorted([text, href, year] for (text, href), year in zip(versions.items(), years)))
+            if listing == known_fingerprint:
+                logger.debug(f'{automaker} : {model} | listing unchanged, skipped')
+                return 0
+
+            vehicles = [
+                {'automaker': automaker, 'model': model, 'year': year, 'version': version_name, 'reference': href}
+                for (version_name, href), year in zip(versions.items(), years)
+            ]
+            if backlog:
+                await backlog.wait()
+            created = await self._db.insert_vehicles(self.SOURCE, vehicles)
+
+            # The fingerprint is stored only once the jobs exist, so an interrupted run retries the model
+            reference = f'{self._factory._base_url}/carros/{automaker}/{model}/'
+            await self._db.upsert_model(automaker, model, reference, versions, years, fingerprint=listing)
+        except Exception as e:
+            # One model failing must not abort the rest of the walk
+            logger.error(f'{automaker} : {model} | catalog failed: {e}')
+            return None
+
+        logger.info(f'{automaker} : {model} | {created} new jobs out of {len(vehicles)} versions')
+        return created
+
+    def sheet_pool(self, workers: int = 1, follow: bool = False) -> SheetWorkerPool:
+        return SheetWorkerPool(self._db, self.SOURCE, self._worker_id, self._process_job,
+                               workers=workers, lease_seconds=self._lease_seconds, follow=follow)
+
+    async def sheet_worker(self, workers: int = 1, follow: bool = False) -> int:
+        return await self.sheet_pool(workers, follow).run()
+
+    async def _process_job(self, job: dict) -> bool:
+        sheet = await self._technical_sheet(job['automaker'], job['model'], job['reference'])
+        if not sheet:
+            return False
+
+        sheet.update({
+            'montadora': job['automaker'],
+            'modelo': job['model'],
+            'versao': job['version'],
+            'ano': job['year'],
+            'source': self.SOURCE,
+            'reference': job['reference'],
+        })
+        outcome = await self._db.save_sheet(sheet)
+        logger.debug(f'technical_sheet [{job["reference"]}] - {outcome}')
+        await self._db.mark_href_scraped(job['automaker'], job['model'], job['reference'])
+        return True
+
+    @staticmethod
+    def sheet_reference(url: str) -> str | None:
+        # Jobs reference sheets by their site-relative path
+        return URL(url).raw_path or None
+
+    @staticmethod
+    def parse_archived_sheet(content: str) -> dict | None:
+        # Runs in the reparse worker processes, so it only needs a parser
+        parser = FichaCompletaParser()
+        document = HtmlDocument(content)
+        if parser.is_captcha(document):
+            return None
+        return parser.technical_sheet(document)
+
+    @staticmethod
+    def keep_previous_values(sheet: dict, previous: dict) -> dict:
+        return sheet
 
     async def _get_automakers(self) -> list[str]:
         response = await self._factory.get_automakers()
@@ -85,11 +161,12 @@ class FichaCompletaCrawler:
             logger.warning(f'get_automakers - unexpected status: {response.status}')
             return []
 
-        if self._parser.is_captcha(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_captcha(document):
             logger.warning('get_automakers - captcha detected')
             return []
 
-        automakers = self._parser.automakers(response.content)
+        automakers = self._parser.automakers(document)
         logger.info(f'get_automakers - found {len(automakers)} automakers')
         return automakers
 
@@ -100,26 +177,29 @@ class FichaCompletaCrawler:
             logger.warning(f'get_models - unexpected status: {response.status}')
             return []
 
-        if self._parser.is_captcha(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_captcha(document):
             logger.warning(f'{automaker} | get_models - captcha detected')
             return []
 
-        models = self._parser.models(response.content)
+        models = self._parser.models(document)
         logger.info(f'{automaker} | get_models - found {len(models)} models')
         return models
 
-    async def _get_version_years(self, automaker: str, model: str) -> tuple[dict, list[str]]:
+    async def _get_version_years(self, automaker: str, model: str) -> tuple[dict, list[str]] | None:
+        """Versions and years of the model's listing, or None when the listing could not be fetched."""
         response = await self._factory.get_version_years(automaker, model)
 
         if response.status != 200:
             logger.warning(f'get_version_years - unexpected status: {response.status}')
-            return {}, []
+            return None
 
-        if self._parser.is_captcha(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_captcha(document):
             logger.warning(f'{automaker} : {model} | get_version_years - captcha detected')
-            return {}, []
+            return None
 
-        versions, years = self._parser.version_years(response.content)
+        versions, years = self._parser.version_years(document)
         logger.info(f'{automaker} : {model} | get_version_years - found {len(versions)} versions')
         return versions, years
 
@@ -130,10 +210,12 @@ class FichaCompletaCrawler:
             logger.warning(f'technical_sheet [{href}] - unexpected status: {response.status}')
             return {}
 
-        if self._parser.is_captcha(response.content):
+        document = HtmlDocument(response.content)
+        if self._parser.is_captcha(document):
             logger.warning(f'technical_sheet [{href}] - captcha detected')
             return {}
 
-        sheet = self._parser.technical_sheet(response.content)
+        sheet = self._parser.technical_sheet(document)
+        sheet['normalized'] = normalize_sheet(sheet)
         logger.info(f'technical_sheet [{href}] - parsed')
         return sheet
@@ -1,16 +1,15 @@
-from lxml import html
+from src.Model.Document import HtmlDocument
 from unidecode import unidecode
 
 
 class FichaCompletaParser:
     _WORDS_REMOVE = {'Quem Somos', 'Contato', 'Política de Privacidade', 'Ver mais', 'Marcas'}
 
-    def is_captcha(self, content: str) -> bool:
-        tree = html.fromstring(content)
-        return any('Digite o código:' in t for t in tree.xpath('//text()'))
+    def is_captcha(self, content: str | HtmlDocument) -> bool:
+        return HtmlDocument.of(content).has_text('Digite o código:', hint='Digite o')
 
-    def automakers(self, content: str) -> list[str]:
-        tree = html.fromstring(content)
+    def automakers(self, content: str | HtmlDocument) -> list[str]:
+        tree = HtmlDocument.of(content).tree
         items = tree.xpath('//span/text()')
         return [
             unidecode(m.lower().strip().replace(' ', '-'))
@@ -18,8 +17,8 @@ class FichaCompletaParser:
             if m.strip() and m.strip() not in self._WORDS_REMOVE
         ]
 
-    def models(self, content: str) -> list[str]:
-        tree = html.fromstring(content)
+    def models(self, content: str | HtmlDocument) -> list[str]:
+        tree = HtmlDocument.of(content).tree
         items = tree.xpath('//span/text()')
         return [
             unidecode(m.lower().strip().replace(' ', '-'))
@@ -27,8 +26,8 @@ class FichaCompletaParser:
             if m.strip() and m.strip() not in self._WORDS_REMOVE
         ]
 
-    def version_years(self, content: str) -> tuple[dict, list[str]]:
-        tree = html.fromstring(content)
+    def version_years(self, content: str | HtmlDocument) -> tuple[dict, list[str]]:
+        tree = HtmlDocument.of(content).tree
         versions: dict[str, str] = {}
         years: list[str] = []
 
@@ -57,8 +56,8 @@ class FichaCompletaParser:
 
         return versions, years
 
-    def technical_sheet(self, content: str) -> dict:
-        tree = html.fromstring(content)
+    def technical_sheet(self, content: str | HtmlDocument) -> dict:
+        tree = HtmlDocument.of(content).tree
         specs = {}
 
         for item in tree.xpath("//div[contains(@class, 'ent-spec-item')]"):
@@ -7,44 +7,54 @@ _ua = UserAgent()
 
 
 class FichaCompletaRequestFactory:
+    HOST = 'www.fichacompleta.com.br'
+
     def __init__(self, network: NetworkManager, db: DatabaseRepository):
         self._network = network
         self._db = db
-        self._base_url = 'https://www.fichacompleta.com.br'
+        self._base_url = f'https://{self.HOST}'
 
     async def get_automakers(self) -> Response:
         url = f'{self._base_url}/carros/marcas/'
-        return await self._fetch(url, referer=f'{self._base_url}/carros/')
+        return await self._fetch(url, referer=f'{self._base_url}/carros/', cache='catalog', kind='catalog')
 
     async def get_models(self, automaker: str) -> Response:
         url = f'{self._base_url}/carros/{automaker}/'
-        return await self._fetch(url, referer=f'{self._base_url}/carros/marcas/')
+        return await self._fetch(url, referer=f'{self._base_url}/carros/marcas/', cache='catalog', kind='catalog')
 
     async def get_version_years(self, automaker: str, model: str) -> Response:
         model = self._normalize(model)
         url = f'{self._base_url}/carros/{automaker}/{model}/'
-        return await self._fetch(url, referer=f'{self._base_url}/carros/{automaker}/')
+        return await self._fetch(url, referer=f'{self._base_url}/carros/{automaker}/', cache='catalog', kind='catalog')
 
     async def get_technical_sheet(self, automaker: str, model: str, href: str) -> Response:
         model = self._normalize(model)
         url = f'{self._base_url}{href}'
-        return await self._fetch(url, referer=f'{self._base_url}/carros/{automaker}/{model}/')
+        return await self._fetch(url, referer=f'{self._base_url}/carros/{automaker}/{model}/', kind='sheet')
 
-    async def _fetch(self, url: str, referer: str = '') -> Response:
+    async def _fetch(self, url: str, referer: str = '', cache: str | None = None, kind: str | None = None) -> Response:
         headers = self._headers(referer)
-        response = await self._network.get(url=url, headers=headers)
+        response = await self._network.get(url=url, headers=headers, cache=cache, validate=self._is_usable, kind=kind)
 
         if not self._is_blocked(response):
             return response
+        self._report_captcha(response)
 
         proxies = await self._db.get_proxies()
         for proxy in proxies:
-            r = await self._network.get(url=url, headers=headers, proxy=proxy)
+            r = await self._network.get(url=url, headers=headers, proxy=proxy, cache=cache,
+                                        validate=self._is_usable, kind=kind)
             if not self._is_blocked(r):
                 return r
+            self._report_captcha(r)
 
         return response
 
+    def _report_captcha(self, response: Response) -> None:
+        # Non-200s already feed the pacer from NetworkManager; only CAPTCHA pages need reporting
+        if response.status == 200:
+            self._network.report_blocked(self.HOST, 'captcha')
+
     @staticmethod
     def _is_blocked(response: Response) -> bool:
         if response.status != 200:
@@ -53,6 +63,10 @@ class FichaCompletaRequestFactory:
             return True
         return False
 
+    @staticmethod
+    def _is_usable(response: Response) -> bool:
+        return not FichaCompletaRequestFactory._is_blocked(response)
+
     @staticmethod
     def _normalize(model: str) -> str:
         m = model.replace('.', '-').replace(':', '-').replace(' ', '-')
@@ -1,18 +1,32 @@
 import logging
-import asyncio
+from src.Logger.Shipper import LogShipper
 from src.Logger.Repository import LogRepository
 
+_shipper: LogShipper | None = None
+
+
+def get_shipper() -> LogShipper:
+    # One repository and one shipper thread for every logger in the process
+    global _shipper
+    if _shipper is None:
+        _shipper = LogShipper(LogRepository())
+    return _shipper
+
 
 class MongoDBHandler(logging.Handler):
     def __init__(self, reference: str | None = None):
         super().__init__()
         self.reference = reference
-        self.repo = LogRepository()
+        self.shipper = get_shipper()
 
     def emit(self, record: logging.LogRecord):
-        message = self.format(record)
         try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(self.repo.insert_log(record.levelname, message, self.reference))
-        except RuntimeError:
-            asyncio.run(self.repo.insert_log(record.levelname, message, self.reference))
+            message = self.format(record)
+            self.shipper.submit(record.levelno, LogRepository.build_log(record.levelname, message, self.reference))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        # logging.shutdown() closes every handler at exit; the first one flushes the shared shipper
+        self.shipper.close()
+        super().close()
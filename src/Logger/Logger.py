@@ -1,7 +1,7 @@
 import logging
 import sys
 import colorlog
-from src.Logger.Handlers import MongoDBHandler
+from src.Logger.Handlers import MongoDBHandler, get_shipper
 from src.Logger.Formatter import get_formatter
 
 _cache: dict[str, logging.Logger] = {}
@@ -28,3 +28,8 @@ def get_logger(name: str = 'scraper', reference: str | None = None) -> logging.L
 
     _cache[cache_key] = logger
     return logger
+
+
+def flush_logs() -> None:
+    """Write every queued log record to MongoDB and stop the shipper thread."""
+    get_shipper().close()
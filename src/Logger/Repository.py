@@ -1,16 +1,21 @@
 import datetime
-from src.Common.DatabaseRepository import DatabaseRepository
+from src.Common.DatabaseRepository import get_repository
 
 
 class LogRepository:
-    def __init__(self):
-        self.db = DatabaseRepository()
-
-    async def insert_log(self, level: str, message: str, reference: str | None = None):
-        await self.db.db.logs.insert_one({
+    @staticmethod
+    def build_log(level: str, message: str, reference: str | None = None) -> dict:
+        now = datetime.datetime.now()
+        return {
             'level': level,
             'message': message,
             'reference': reference,
-            'date': datetime.datetime.now().strftime('%d-%m-%Y'),
-            'time': datetime.datetime.now().strftime('%H:%M:%S'),
-        })
+            'date': now.strftime('%d-%m-%Y'),
+            'time': now.strftime('%H:%M:%S'),
+        }
+
+    def insert_logs(self, documents: list[dict]) -> None:
+        # Called from the shipper thread, so it goes through the synchronous pymongo client
+        # wrapped by the shared motor client instead of needing an event loop. The repository
+        # is resolved on first write, after the CLI has applied its connection settings.
+        get_repository().db.delegate.logs.insert_many(documents, ordered=False)
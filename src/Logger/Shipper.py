@@ -0,0 +1,105 @@
+import sys
+import time
+import queue
+import logging
+import threading
+from src.Logger.Repository import LogRepository
+
+
+class LogShipper:
+    """Ships log documents to MongoDB in batches from a background thread.
+
+    Records go into a bounded queue and are written with ``insert_many`` once
+    ``batch_size`` of them are waiting or ``flush_interval`` seconds have passed.
+    Past 80% of ``max_queue`` only one in ``debug_sample`` DEBUG records is kept;
+    anything that does not fit once the queue is full is dropped and counted, and
+    the count is written as a WARNING with the next batch. :meth:`close` flushes
+    whatever is still queued.
+    """
+
+    _STOP = object()
+
+    def __init__(self, repo: LogRepository, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 2.0, debug_sample: int = 10):
+        self._repo = repo
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._high_water = int(max_queue * 0.8)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._debug_sample = debug_sample
+        self._debug_seen = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+        self._thread.start()
+
+    def submit(self, levelno: int, document: dict) -> None:
+        if self._closed.is_set():
+            return
+
+        if levelno <= logging.DEBUG and self._queue.qsize() >= self._high_water:
+            with self._lock:
+                self._debug_seen += 1
+                if self._debug_seen % self._debug_sample:
+                    self._dropped += 1
+                    return
+
+        try:
+            self._queue.put_nowait(document)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._collect()
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def _collect(self) -> tuple[list[dict], bool]:
+        batch: list[dict] = []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                # Drain what is left so shutdown loses nothing that was accepted
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        return batch, True
+                    if item is not self._STOP:
+                        batch.append(item)
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch: list[dict]) -> None:
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            batch.append(LogRepository.build_log('WARNING', f'log shipper dropped {dropped} records (queue full)'))
+
+        try:
+            self._repo.insert_logs(batch)
+        except Exception as e:
+            # Logging here would feed straight back into this queue
+            sys.stderr.write(f'log shipper: failed to write {len(batch)} records: {e}\n')
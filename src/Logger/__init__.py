@@ -1,3 +1,3 @@
-from src.Logger.Logger import get_logger
+from src.Logger.Logger import get_logger, flush_logs
 
-__all__ = ['get_logger']
+__all__ = ['get_logger', 'flush_logs']
@@ -0,0 +1,38 @@
+from lxml import html
+
+
+class HtmlDocument:
+    """An HTML page parsed at most once and shared by detection and extraction.
+
+    The lxml tree is only built when something asks for it, so a page rejected by a
+    cheap raw-text check never gets parsed at all.
+    """
+
+    __slots__ = ('content', '_tree')
+
+    def __init__(self, content: str | bytes):
+        self.content = content
+        self._tree = None
+
+    @classmethod
+    def of(cls, content: 'str | bytes | HtmlDocument') -> 'HtmlDocument':
+        return content if isinstance(content, HtmlDocument) else cls(content)
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = html.fromstring(self.content)
+        return self._tree
+
+    def has_text(self, marker: str, hint: str | None = None) -> bool:
+        """True when some text node contains ``marker``.
+
+        ``hint`` is a fragment that must appear verbatim in the raw markup whenever the
+        marker is present (pick one without accents, which may be entity-encoded). When
+        the hint is missing the page is rejected without being parsed.
+        """
+        hint = hint or marker
+        raw_hint = hint.encode() if isinstance(self.content, bytes) else hint
+        if raw_hint not in self.content:
+            return False
+        return any(marker in text for text in self.tree.xpath('//text()'))
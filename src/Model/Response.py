@@ -54,3 +54,17 @@ class Response:
 
     def __repr__(self):
         return repr(self.to_dict())
+
+
+@dataclass
+class ResponseRecord:
+    url: str
+    status: int | None
+    response_time: float | None
+    size: int
+
+    @classmethod
+    def of(cls, response: Response) -> 'ResponseRecord':
+        content = response.content
+        size = len(content) if isinstance(content, (str, bytes)) else 0
+        return cls(url=str(response.url), status=response.status, response_time=response.response_time, size=size)